@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+import stats
+from storage import get_storage, sum_entries, DEFAULT_STORAGE, STORAGE_BACKENDS
+
+# Opt-in single writer for many instances: the first instance starts this process on
+# a Unix domain socket, every instance sends it (date, title, seconds) deltas, and it
+# applies whatever arrived within BATCH_INTERVAL to the storage in one go. Select it
+# with "storage": "aggregator+<backend>" in config.json.
+
+SOCKET_PATH = "timelog.sock"
+BATCH_INTERVAL = 0.5  # s
+IDLE_EXIT = 600  # s without any delta before the aggregator quits
+CONNECT_TIMEOUT = 5  # s to wait for a freshly started aggregator
+
+class Batcher:
+    # Collects deltas from any thread and applies them in batches on one worker thread
+    def __init__(self, storage, interval=BATCH_INTERVAL):
+        self.storage = storage
+        self.interval = interval
+        self.pending = queue.Queue()
+        self.last_activity = time.monotonic()
+        self.thread = threading.Thread(target=self.run, name="timelog-aggregator", daemon=True)
+        self.thread.start()
+
+    def submit(self, date_str, title, seconds):
+        # Returns a (done event, result list) pair; result gets the error or None
+        done, result = threading.Event(), []
+        self.pending.put(((date_str, title, int(seconds)), done, result))
+        self.last_activity = time.monotonic()
+        return done, result
+
+    def run(self):
+        while True:
+            batch = [self.pending.get()]
+            if batch[0] is None:
+                return
+            deadline = time.monotonic() + self.interval
+            stop = False
+            while True:
+                try:
+                    item = self.pending.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self.apply(batch)
+            if stop:
+                return
+
+    def apply(self, batch):
+        error = None
+        stats.count("aggregator.batches")
+        stats.count("aggregator.deltas", len(batch))
+        try:
+            with stats.timer("aggregator.apply"):
+                totals = sum_entries(delta for delta, _, _ in batch)
+                self.storage.import_entries([(d, t, s) for (d, t), s in totals.items()])
+        except Exception as e:
+            error = e
+        for _, done, result in batch:
+            result.append(error)
+            done.set()
+
+    def close(self):
+        self.pending.put(None)
+        self.thread.join()
+
+class LocalAggregator:
+    # In-process stand-in with the storage interface, for tests and single-process use
+    def __init__(self, storage, interval=BATCH_INTERVAL):
+        self.storage = storage
+        self.batcher = Batcher(storage, interval)
+
+    def add(self, date_str, title, seconds):
+        done, result = self.batcher.submit(date_str, title, seconds)
+        done.wait()
+        if result[0] is not None:
+            raise result[0]
+
+    def import_entries(self, entries):
+        for date_str, title, seconds in entries:
+            self.add(date_str, title, seconds)
+
+    def entries(self):
+        return self.storage.entries()
+
+    def close(self):
+        self.batcher.close()
+        self.storage.close()
+
+# === SERVER ===
+
+class DeltaHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                delta = json.loads(line)
+                done, result = self.server.batcher.submit(delta["date"], delta["title"], delta["seconds"])
+                done.wait()
+                reply = {"ok": result[0] is None, "error": None if result[0] is None else str(result[0])}
+            except (ValueError, KeyError) as e:
+                reply = {"ok": False, "error": f"bad delta: {e}"}
+            self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+
+if hasattr(socket, "AF_UNIX"):
+    # UnixStreamServer does not exist without Unix sockets (older Windows); the
+    # client then writes directly, see aggregator_storage
+    class AggregatorServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+def socket_alive(path=SOCKET_PATH):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.connect(path)
+        return True
+    except OSError:
+        return False
+
+def serve(storage_name=DEFAULT_STORAGE, path=SOCKET_PATH, interval=BATCH_INTERVAL, idle_exit=IDLE_EXIT):
+    if os.path.exists(path):
+        if socket_alive(path):
+            return  # another aggregator already runs
+        os.remove(path)
+    storage = get_storage(storage_name)
+    server = AggregatorServer(path, DeltaHandler)
+    server.batcher = Batcher(storage, interval)
+
+    def watch_idle():
+        while True:
+            time.sleep(min(idle_exit, 30))
+            if time.monotonic() - server.batcher.last_activity > idle_exit:
+                server.shutdown()
+                return
+
+    threading.Thread(target=watch_idle, daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        server.batcher.close()
+        storage.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+# === CLIENT ===
+
+class AggregatorClient:
+    # Storage interface that sends deltas to the aggregator, starting it if needed.
+    # Reads (entries) go straight to the underlying storage.
+    def __init__(self, storage_name=DEFAULT_STORAGE, path=SOCKET_PATH):
+        self.storage_name = storage_name
+        self.path = path
+        self.sock = None
+        self.reader = None
+        self.storage = None
+
+    def connect(self):
+        if self.sock is not None:
+            return
+        try:
+            self.open_socket()
+        except OSError:
+            self.start_server()
+            deadline = time.monotonic() + CONNECT_TIMEOUT
+            while True:
+                try:
+                    self.open_socket()
+                    return
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.05)
+
+    def open_socket(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+        self.reader = sock.makefile("rb")
+
+    def start_server(self):
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--storage", self.storage_name, "--socket", self.path],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True)
+
+    def add(self, date_str, title, seconds):
+        message = (json.dumps({"date": date_str, "title": title, "seconds": int(seconds)}) + "\n").encode("utf-8")
+        for attempt in (1, 2):
+            try:
+                self.connect()
+                self.sock.sendall(message)
+                break
+            except OSError:
+                # The aggregator may have exited while idle; reconnect (and restart it) once
+                self.disconnect()
+                if attempt == 2:
+                    raise
+        # Once sent, the delta may already be applied, so a lost reply is an error, not a retry
+        line = self.reader.readline()
+        if not line:
+            self.disconnect()
+            raise ConnectionError("aggregator closed the connection before confirming the save")
+        reply = json.loads(line)
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+
+    def import_entries(self, entries):
+        for date_str, title, seconds in entries:
+            self.add(date_str, title, seconds)
+
+    def entries(self):
+        if self.storage is None:
+            self.storage = get_storage(self.storage_name)
+        return self.storage.entries()
+
+    def disconnect(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def close(self):
+        self.disconnect()
+        if self.storage is not None:
+            self.storage.close()
+            self.storage = None
+
+def aggregator_storage(storage_name):
+    # Without Unix sockets or in a frozen build there is nothing to start; write directly
+    if not hasattr(socket, "AF_UNIX") or getattr(sys, "frozen", False):
+        return get_storage(storage_name)
+    return AggregatorClient(storage_name)
+
+# === RUN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch time deltas from many tracker instances into one storage.")
+    parser.add_argument("--storage", default=DEFAULT_STORAGE, choices=sorted(STORAGE_BACKENDS))
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--interval", type=float, default=BATCH_INTERVAL, help="seconds to collect deltas before writing")
+    parser.add_argument("--idle-exit", type=float, default=IDLE_EXIT, help="quit after this many idle seconds")
+    args = parser.parse_args()
+    serve(args.storage, args.socket, args.interval, args.idle_exit)
@@ -0,0 +1,184 @@
+import argparse
+import datetime
+import random
+import time
+from storage import get_storage, empty_storage_message, iter_timelog, date_to_ordinal, format_seconds, STORAGE_BACKENDS
+
+# numpy is optional: the tracker itself never needs it, only this module does
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def require_numpy():
+    if np is None:
+        raise ImportError("analytics.py needs numpy (pip install numpy)")
+
+class TimeLogColumns:
+    # The log as three parallel arrays (day ordinal, title id, seconds) plus the title dictionary
+    def __init__(self, days, title_ids, seconds, titles):
+        self.days = days
+        self.title_ids = title_ids
+        self.seconds = seconds
+        self.titles = titles
+
+    @property
+    def first_day(self):
+        return int(self.days.min())
+
+    @property
+    def last_day(self):
+        return int(self.days.max())
+
+def load_columns(*entry_sources):
+    # Several sources (e.g. one log per person) are stacked into one set of columns
+    require_numpy()
+    title_index = {}
+    date_cache = {}
+    days, title_ids, seconds = [], [], []
+    for entries in entry_sources:
+        for date_str, title, secs in entries:
+            day = date_cache.get(date_str)
+            if day is None:
+                day = date_cache[date_str] = date_to_ordinal(date_str)
+            days.append(day)
+            title_ids.append(title_index.setdefault(title, len(title_index)))
+            seconds.append(secs)
+    titles = [None] * len(title_index)
+    for title, i in title_index.items():
+        titles[i] = title
+    return TimeLogColumns(
+        np.array(days, dtype=np.int32),
+        np.array(title_ids, dtype=np.int32),
+        np.array(seconds, dtype=np.int64),
+        titles,
+    )
+
+def daily_matrix(cols):
+    # Dense (day, title) matrix of seconds, row 0 being cols.first_day
+    n_days = cols.last_day - cols.first_day + 1
+    n_titles = len(cols.titles)
+    flat = (cols.days - cols.first_day).astype(np.int64) * n_titles + cols.title_ids
+    return np.bincount(flat, weights=cols.seconds, minlength=n_days * n_titles).reshape(n_days, n_titles)
+
+def rolling_sums(cols, window):
+    matrix = daily_matrix(cols)
+    cumulative = np.cumsum(matrix, axis=0)
+    rolled = cumulative.copy()
+    rolled[window:] -= cumulative[:-window]
+    return rolled
+
+def working_days(first_day, last_day):
+    # Mon-Fri count; date.fromordinal(1) is a Monday, so weekday == (ordinal - 1) % 7
+    weekdays = (np.arange(first_day, last_day + 1) - 1) % 7
+    return int(np.count_nonzero(weekdays < 5))
+
+def utilisation(cols, hours_per_day=8.0):
+    # Percentage of the available working time (Mon-Fri) spent on each title
+    per_title = np.bincount(cols.title_ids, weights=cols.seconds, minlength=len(cols.titles))
+    capacity = working_days(cols.first_day, cols.last_day) * hours_per_day * 3600
+    return per_title / capacity * 100 if capacity else np.zeros_like(per_title)
+
+def project_billable_hours(cols, until_day, window=30):
+    # Current total plus the average daily rate of the last `window` days carried forward
+    matrix = daily_matrix(cols)
+    totals = matrix.sum(axis=0)
+    rate = matrix[-window:].mean(axis=0)
+    remaining = max(until_day - cols.last_day, 0)
+    return (totals + rate * remaining) / 3600
+
+# === ROW-BY-ROW REFERENCE ===
+
+def rolling_sums_rows(entries, window):
+    per_day = {}
+    for date_str, title, secs in entries:
+        key = (date_to_ordinal(date_str), title)
+        per_day[key] = per_day.get(key, 0) + secs
+    first = min(day for day, _ in per_day)
+    last = max(day for day, _ in per_day)
+    titles = sorted({title for _, title in per_day})
+    result = {}
+    for title in titles:
+        running = 0
+        for day in range(first, last + 1):
+            running += per_day.get((day, title), 0)
+            if day - window >= first:
+                running -= per_day.get((day - window, title), 0)
+            result[(day, title)] = running
+    return result
+
+# === BENCHMARK ===
+
+def synthetic_entries(years, titles, seed=0):
+    rng = random.Random(seed)
+    start = datetime.date.today().toordinal() - years * 365
+    names = [f"Title {i}" for i in range(titles)]
+    for day in range(start, start + years * 365):
+        date_str = datetime.date.fromordinal(day).strftime("%d.%m.%Y")
+        for title in rng.sample(names, min(len(names), rng.randint(1, 5))):
+            yield date_str, title, rng.randint(60, 4 * 3600)
+
+def benchmark(years=5, titles=100, window=30):
+    entries = list(synthetic_entries(years, titles))
+
+    start = time.perf_counter()
+    rolling_sums_rows(entries, window)
+    rows_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cols = load_columns(entries)
+    load_time = time.perf_counter() - start
+    start = time.perf_counter()
+    rolling_sums(cols, window)
+    numpy_time = time.perf_counter() - start
+
+    return {
+        "entries": len(entries),
+        "titles": titles,
+        "window": window,
+        "row_by_row_s": rows_time,
+        "numpy_load_s": load_time,
+        "numpy_compute_s": numpy_time,
+        "speedup": rows_time / numpy_time if numpy_time else float("inf"),
+    }
+
+# === RUN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rolling sums, utilisation and billable projections per title.")
+    parser.add_argument("--storage", choices=sorted(STORAGE_BACKENDS), help="default: the storage setting in config.json")
+    parser.add_argument("--csv", nargs="*", help="read one or more wide timelog.csv files instead of the storage")
+    parser.add_argument("--hours-per-day", type=float, default=8.0)
+    parser.add_argument("--until", help="project billable hours up to this date (dd.mm.yyyy)")
+    parser.add_argument("--bench", action="store_true", help="compare against the row-by-row path on synthetic data")
+    args = parser.parse_args()
+    require_numpy()
+
+    if args.bench:
+        for years, titles in ((1, 10), (5, 100), (20, 1000)):
+            result = benchmark(years, titles)
+            print(f"{years:>2}y x {titles:>4} titles: rows {result['row_by_row_s']:.3f}s, "
+                  f"numpy {result['numpy_compute_s']:.3f}s (+{result['numpy_load_s']:.3f}s load), "
+                  f"{result['speedup']:.0f}x")
+    else:
+        if args.csv:
+            cols = load_columns(*(iter_timelog(path) for path in args.csv))
+        else:
+            from config import load_config, current_profile
+            name = args.storage or load_config(current_profile())[2]
+            storage = get_storage(name)
+            cols = load_columns(storage.entries())
+            storage.close()
+        if not cols.titles:
+            print(f"No tracked time in {', '.join(args.csv)}." if args.csv else empty_storage_message(name))
+            raise SystemExit(0)
+
+        last7 = rolling_sums(cols, 7)[-1]
+        last30 = rolling_sums(cols, 30)[-1]
+        util = utilisation(cols, args.hours_per_day)
+        until = date_to_ordinal(args.until) if args.until else cols.last_day
+        projected = project_billable_hours(cols, until)
+        width = max(len(title) for title in cols.titles)
+        print(f"{'Title':<{width}}  {'7 days':>10}  {'30 days':>10}  {'util %':>7}  {'proj. h':>8}")
+        for i in np.argsort(-util):
+            print(f"{cols.titles[i]:<{width}}  {format_seconds(last7[i]):>10}  {format_seconds(last30[i]):>10}  "
+                  f"{util[i]:>7.1f}  {projected[i]:>8.1f}")
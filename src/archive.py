@@ -0,0 +1,133 @@
+import csv
+import datetime
+import gzip
+import json
+import os
+from storage import date_to_ordinal, format_seconds, LONG_HEADER, FILE, LOCK_PATH
+
+# Retention for the wide timelog.csv: days older than the retention period move into
+# gzip-compressed long-format segments in timelog.archive/, one or more per year,
+# never rewritten once written. index.json lists the segments (date range, entry
+# count, total) and `compacted_before`, the first day still kept in timelog.csv.
+# Writing the index is the commit point: rows before that day which are still in
+# timelog.csv (a compaction that crashed halfway) are ignored and dropped on the
+# next write. After the first `python archive.py compact`, saves with the csv backend
+# compact again by themselves once the hot file holds COMPACT_EVERY extra days.
+
+ARCHIVE_DIR = "timelog.archive"
+INDEX_FILE = os.path.join(ARCHIVE_DIR, "index.json")
+RETENTION_DAYS = 90
+COMPACT_EVERY = 30  # days past the retention period before saves compact again
+
+_index_cache = {"signature": None, "index": None}
+
+def load_index():
+    # None until the first compaction; cached until index.json changes
+    try:
+        st = os.stat(INDEX_FILE)
+    except FileNotFoundError:
+        return None
+    signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+    if _index_cache["signature"] != signature:
+        with open(INDEX_FILE, "r", encoding="utf-8") as f:
+            _index_cache["index"] = json.load(f)
+        _index_cache["signature"] = signature
+    return _index_cache["index"]
+
+def save_index(index):
+    tmp_path = INDEX_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, INDEX_FILE)
+
+def archived_before():
+    # Day ordinal of the first day kept in timelog.csv, 0 without an archive
+    index = load_index()
+    return index["compacted_before"] if index else 0
+
+def write_segment(year, entries, index):
+    # One new immutable segment; returns its index entry
+    seq = 1 + sum(1 for segment in index["segments"] if segment["year"] == year)
+    name = f"{year}.{seq:03d}.csv.gz"
+    path = os.path.join(ARCHIVE_DIR, name)
+    entries = sorted(entries, key=lambda e: (date_to_ordinal(e[0]), e[1]))
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(LONG_HEADER)
+        writer.writerows([d, t, int(s)] for d, t, s in entries)
+    os.replace(tmp_path, path)
+    return {
+        "file": name,
+        "year": year,
+        "first": entries[0][0],
+        "last": entries[-1][0],
+        "entries": len(entries),
+        "seconds": sum(int(s) for _, _, s in entries),
+    }
+
+def archive_entries(entries, compacted_before=None, retention_days=None):
+    # Writes the entries as new per-year segments, then the index. Callers hold the
+    # timelog.csv lock.
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    index = dict(load_index() or {"version": 1, "retention_days": RETENTION_DAYS, "compacted_before": 0, "segments": []})
+    index["segments"] = list(index["segments"])
+    by_year = {}
+    for entry in entries:
+        by_year.setdefault(int(entry[0].rsplit(".", 1)[1]), []).append(entry)
+    for year, year_entries in sorted(by_year.items()):
+        index["segments"].append(write_segment(year, year_entries, index))
+    if compacted_before is not None:
+        index["compacted_before"] = max(index["compacted_before"], compacted_before)
+    if retention_days is not None:
+        index["retention_days"] = retention_days
+    save_index(index)
+
+def iter_archive(start_day=None, end_day=None):
+    # (date, title, seconds) from every segment that can overlap [start_day, end_day]
+    index = load_index()
+    if not index:
+        return
+    for segment in sorted(index["segments"], key=lambda s: date_to_ordinal(s["first"])):
+        if start_day is not None and date_to_ordinal(segment["last"]) < start_day:
+            continue
+        if end_day is not None and date_to_ordinal(segment["first"]) > end_day:
+            continue
+        with gzip.open(os.path.join(ARCHIVE_DIR, segment["file"]), "rt", newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if row == LONG_HEADER:
+                    continue
+                yield row[0], row[1], int(row[2])
+
+def compact(days=RETENTION_DAYS):
+    # Moves everything older than `days` days out of timelog.csv; returns (days, entries) moved
+    from filelock import FileLock
+    from storage import WideCsvStorage
+    cutoff = datetime.date.today().toordinal() - days
+    store = WideCsvStorage()
+    with FileLock(LOCK_PATH):
+        store.load()
+        moved = store.archive_before(cutoff, days)
+        store.write()
+    return moved
+
+# === RUN ===
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description=f"Move old days out of {FILE} into compressed yearly archive segments.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("compact", help=f"archive days older than --days (default {RETENTION_DAYS})").add_argument(
+        "--days", type=int, default=RETENTION_DAYS)
+    sub.add_parser("list", help="show the archive segments")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        days, entries = compact(args.days)
+        print(f"Archived {days} days ({entries} entries) into {ARCHIVE_DIR}; {FILE} keeps the last {args.days} days.")
+    else:
+        index = load_index()
+        if not index:
+            print("No archive yet.")
+        else:
+            for segment in index["segments"]:
+                print(f"{segment['file']:<18} {segment['first']} – {segment['last']}  {segment['entries']:>7} entries  {format_seconds(segment['seconds']):>12}")
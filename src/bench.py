@@ -0,0 +1,358 @@
+import argparse
+import csv
+import datetime
+import importlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+# Benchmarks for the save, load and tick hot paths of v4, v5 and v6. Tk and win32gui
+# are replaced with stand-ins, so this runs headless on any OS. Results are JSON so
+# runs from different versions/machines can be diffed.
+
+SIZES = [(1, 10), (5, 100), (20, 1000)]
+TITLES_PER_DAY = 5
+
+# === STAND-INS ===
+
+class FakeWidget:
+    def __init__(self, *args, **kwargs):
+        self.options = dict(kwargs)
+
+    def config(self, **kwargs):
+        self.options.update(kwargs)
+
+    configure = config
+
+    def pack(self, *args, **kwargs):
+        pass
+
+    def grid(self, *args, **kwargs):
+        pass
+
+    def destroy(self):
+        pass
+
+class FakeTk(FakeWidget):
+    def __init__(self):
+        super().__init__()
+        self.jobs = {}
+        self.next_job = 0
+
+    def title(self, text=None):
+        self.options["title"] = text
+
+    def resizable(self, *args):
+        pass
+
+    def state(self):
+        return "normal"
+
+    def protocol(self, *args):
+        pass
+
+    def after(self, ms, fn):
+        self.next_job += 1
+        self.jobs[self.next_job] = fn
+        return self.next_job
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+class FakeVar:
+    def __init__(self, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+window = {"title": ""}
+
+def install_fakes():
+    tk = types.ModuleType("tkinter")
+    for name in ("Label", "Button", "Frame", "Toplevel", "Entry", "Checkbutton"):
+        setattr(tk, name, FakeWidget)
+    tk.Tk = FakeTk
+    tk.StringVar = tk.BooleanVar = tk.IntVar = FakeVar
+    for name in ("DISABLED", "NORMAL", "LEFT", "RIGHT", "W", "E", "X", "BOTH", "END"):
+        setattr(tk, name, name.lower())
+
+    tk.font = types.ModuleType("tkinter.font")
+    tk.font.Font = FakeWidget
+    tk.simpledialog = types.ModuleType("tkinter.simpledialog")
+    tk.simpledialog.askstring = lambda *args, **kwargs: "Bench"
+    tk.messagebox = types.ModuleType("tkinter.messagebox")
+    tk.messagebox.showinfo = tk.messagebox.showwarning = tk.messagebox.showerror = lambda *args, **kwargs: None
+    tk.messagebox.askyesnocancel = lambda *args, **kwargs: None
+
+    win32gui = types.ModuleType("win32gui")
+    win32gui.GetForegroundWindow = lambda: 1
+    win32gui.GetWindowText = lambda hwnd: window["title"]
+
+    sys.modules.update({
+        "tkinter": tk,
+        "tkinter.font": tk.font,
+        "tkinter.simpledialog": tk.simpledialog,
+        "tkinter.messagebox": tk.messagebox,
+        "win32gui": win32gui,
+    })
+
+# === DATA ===
+
+def write_synthetic_timelog(path, years, titles, seed=0):
+    # Wide layout exactly like save_time_to_csv writes it: newest date first, a column per title
+    rng = random.Random(seed)
+    names = [f"Title {i}" for i in range(titles)]
+    today = datetime.date.today().toordinal()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["Date"] + sorted(names))
+        writer.writeheader()
+        for day in range(today - 1, today - 1 - years * 365, -1):
+            row = {"Date": datetime.date.fromordinal(day).strftime("%d.%m.%Y")}
+            for name in rng.sample(names, min(TITLES_PER_DAY, titles)):
+                row[name] = str(datetime.timedelta(seconds=rng.randint(60, 4 * 3600)))
+            writer.writerow(row)
+
+# === MEASURING ===
+
+def timings(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "max_s": max(samples)}
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+class LockTimer:
+    # Wraps filelock.FileLock to record how long each lock is held
+    def __init__(self):
+        import filelock
+        self.module = filelock
+        self.original = filelock.FileLock
+        self.held = []
+
+    def __enter__(self):
+        timer = self
+        original = self.original
+
+        class TimedFileLock(original):
+            def acquire(self, *args, **kwargs):
+                result = super().acquire(*args, **kwargs)
+                self.acquired_at = time.perf_counter()
+                return result
+
+            def release(self, *args, **kwargs):
+                timer.held.append(time.perf_counter() - self.acquired_at)
+                return super().release(*args, **kwargs)
+
+        self.module.FileLock = TimedFileLock
+        return self
+
+    def __exit__(self, *exc):
+        self.module.FileLock = self.original
+
+    def summary(self):
+        return statistics.median(self.held) if self.held else None
+
+# === BENCHMARKS ===
+
+def bench_v5_save(seed_csv, repeat):
+    shutil.copy(seed_csv, "timelog.csv")
+    with LockTimer() as locks:
+        v5 = importlib.reload(importlib.import_module("v5"))
+        app = v5.TimeTrackerApp(FakeTk())
+        app.timer_title = "Title 0"
+
+        def save():
+            app.total_time = 60
+            app.save_time_to_csv()
+
+        result = timings(save, repeat)
+        result["lock_hold_s"] = locks.summary()
+    result["peak_bytes"] = peak_memory(save)
+    return result
+
+def bench_v6_save(seed_csv, backend, repeat):
+    import storage
+    shutil.copy(seed_csv, storage.FILE)
+    store = storage.get_storage(backend)
+    store.add("01.01.2000", "Warmup", 0)
+    today = datetime.datetime.now().strftime(storage.DATE_FORMAT)
+
+    def save():
+        store.add(today, "Title 0", 60)
+
+    with LockTimer() as locks:
+        result = timings(save, repeat)
+        result["lock_hold_s"] = locks.summary()
+    result["peak_bytes"] = peak_memory(save)
+    store.close()
+    return result
+
+def check_engine():
+    # A scripted evening replayed through the tracker (focus switches, a pause,
+    # midnight) and saved through the in-process aggregator must come back exactly
+    from aggregator import LocalAggregator
+    from focus import ScriptedFocusProvider
+    from storage import JournalStorage, sum_entries
+    from tracker import MultiTargetTracker
+    midnight = datetime.datetime(2026, 1, 2).timestamp()
+    tracker = MultiTargetTracker([("Photoshop", "Design"), ("Firefox", "Research")])
+    provider = ScriptedFocusProvider([
+        (midnight - 600, "Adobe Photoshop"),
+        (midnight - 300, "Firefox"),
+        (midnight - 120, "Adobe Photoshop"),
+        (midnight + 300, "Terminal"),
+    ])
+    provider.start(tracker.on_focus_change)
+    provider.play(until=midnight + 60)
+    tracker.set_paused(True, midnight + 60)
+    tracker.set_paused(False, midnight + 120)
+    provider.play()
+    by_day, _ = tracker.take(midnight + 600)
+    expected = {("01.01.2026", "Design"): 420, ("01.01.2026", "Research"): 180, ("02.01.2026", "Design"): 240}
+    if by_day != expected:
+        raise AssertionError(f"tracker: expected {expected}, got {by_day}")
+    aggregator = LocalAggregator(JournalStorage("check.journal.csv", "check.journal.csv.lock"))
+    aggregator.import_entries((d, t, s) for (d, t), s in by_day.items())
+    saved = sum_entries(aggregator.entries())
+    aggregator.close()
+    if saved != expected:
+        raise AssertionError(f"aggregator: expected {expected}, got {saved}")
+
+def bench_tick(version, repeat):
+    window["title"] = "Adobe Photoshop"
+    module = importlib.reload(importlib.import_module(version))
+    app = module.TimeTrackerApp(FakeTk())
+    if version == "v6":
+        # v6 only works on focus changes; a "tick" is one focus change plus the redraw
+        from focus import ScriptedFocusProvider
+        provider = ScriptedFocusProvider()
+        provider.start(app.engine.on_focus_change)
+        titles = ["Adobe Photoshop", "Firefox"]
+        counter = iter(range(10 ** 9))
+        def tick():
+            provider.emit(titles[next(counter) % 2])
+            app.update_timer()
+        should = lambda: app.engine.tracking
+    else:
+        app.target_window = "Photoshop"
+        tick = app.update_timer
+        should = app.should_be_tracking
+    result = {"update_timer": timings(lambda: [tick() for _ in range(1000)], repeat)}
+    result["should_be_tracking"] = timings(lambda: [should() for _ in range(1000)], repeat)
+    for value in result.values():
+        for key in list(value):
+            value[key] /= 1000
+    if version == "v6":
+        app.on_close()
+    return result
+
+def bench_dashboard(timers, repeat):
+    # One render pass of the dashboard with N timers, and how many widgets it touched
+    import stats
+    with open("config.json", "w") as f:
+        json.dump({"targets": [{"target": f"App {i}", "title": f"Title {i}"} for i in range(timers)]}, f)
+    window["title"] = "App 0"
+    dashboard = importlib.reload(importlib.import_module("dashboard"))
+    app = dashboard.Dashboard(FakeTk())
+    was_enabled = stats.ENABLED
+    stats.enable()
+    stats.reset()
+    result = timings(lambda: [app.render() for _ in range(1000)], repeat)
+    for key in list(result):
+        result[key] /= 1000
+    result["widget_updates_per_pass"] = stats.snapshot()["counters"].get("render.updates", 0) / (1000 * repeat)
+    stats.enable(was_enabled)
+    app.on_close()
+    return result
+
+def bench_load_config(version, repeat):
+    with open("config.json", "w") as f:
+        json.dump({"target_window": "Photoshop", "timer_title": "Bench"}, f)
+    module = importlib.import_module("config" if version == "v6" else version)
+    return timings(module.load_config, repeat)
+
+def run(sizes, repeat, versions):
+    install_fakes()
+    src = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, src)
+    results = []
+    workdir = tempfile.mkdtemp(prefix="timelog-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        if "v6" in versions:
+            check_engine()
+        for version in versions:
+            results.append({"version": version, "bench": "load_config", **bench_load_config(version, repeat)})
+            results.append({"version": version, "bench": "tick", **bench_tick(version, repeat)})
+        if "v6" in versions:
+            for timers in (1, 12, 48):
+                results.append({"version": "v6", "bench": "dashboard_render", "timers": timers, **bench_dashboard(timers, repeat)})
+
+        for years, titles in sizes:
+            seed_csv = os.path.join(workdir, f"seed-{years}-{titles}.csv")
+            write_synthetic_timelog(seed_csv, years, titles)
+            size = {"years": years, "titles": titles, "file_bytes": os.path.getsize(seed_csv)}
+            if "v5" in versions:
+                results.append({"version": "v5", "bench": "save", **size, **bench_v5_save(seed_csv, repeat)})
+            if "v6" in versions:
+                import binstore
+                import storage
+                for backend in storage.STORAGE_BACKENDS:
+                    for leftover in (storage.JOURNAL_FILE, storage.DB_FILE, binstore.BIN_FILE, binstore.TITLES_FILE):
+                        if os.path.exists(leftover):
+                            os.remove(leftover)
+                    results.append({"version": "v6", "bench": "save", "backend": backend, **size,
+                                    **bench_v6_save(seed_csv, backend, repeat)})
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+# === RUN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark save, load and tick paths; prints JSON.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--versions", nargs="+", default=["v4", "v5", "v6"])
+    parser.add_argument("--size", nargs=2, type=int, action="append", metavar=("YEARS", "TITLES"),
+                        help="synthetic log size, may be repeated (default: 1x10, 5x100, 20x1000)")
+    parser.add_argument("--out", help="write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = run([tuple(s) for s in args.size] if args.size else SIZES, args.repeat, args.versions)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
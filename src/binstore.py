@@ -0,0 +1,229 @@
+import argparse
+import bisect
+import csv
+import json
+import mmap
+import os
+import struct
+import stats
+from storage import iter_timelog, write_wide_csv, date_to_ordinal, ordinal_to_date, format_seconds, FILE
+
+# Binary time log: a small header followed by fixed-width records
+# (day ordinal, title id, seconds), plus a title dictionary with one JSON string per
+# line where the line number is the title id. Reads go through mmap, so totals and
+# range queries never decode any text.
+
+BIN_FILE = "timelog.bin"
+TITLES_FILE = "timelog.titles"
+BIN_LOCK_PATH = "timelog.bin.lock"
+
+MAGIC = b"TLB1"
+HEADER = struct.Struct("<4sHH")  # magic, version, flags
+RECORD = struct.Struct("<III")   # day ordinal, title id, seconds
+VERSION = 1
+FLAG_SORTED = 1  # records are in non-decreasing day order, so range queries can bisect
+
+def read_titles(path=TITLES_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+class BinaryLog:
+    # Read-only view of a binary log
+    def __init__(self, path=BIN_FILE, titles_path=TITLES_FILE):
+        self.titles = read_titles(titles_path)
+        self.file = None
+        self.mm = None
+        self.flags = FLAG_SORTED
+        self.count = 0
+        if os.path.exists(path) and os.path.getsize(path) > HEADER.size:
+            self.file = open(path, "rb")
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self.flags = HEADER.unpack_from(self.mm, 0)
+            if magic != MAGIC or version != VERSION:
+                self.close()
+                raise ValueError(f"{path} is not a version {VERSION} binary time log")
+            self.count = (len(self.mm) - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def day_at(self, i):
+        return RECORD.unpack_from(self.mm, HEADER.size + i * RECORD.size)[0]
+
+    def bounds(self, start_day=None, end_day=None):
+        # Record index range that can hold days in [start_day, end_day]
+        if not self.flags & FLAG_SORTED:
+            return 0, self.count
+        days = _DayIndex(self)
+        lo = 0 if start_day is None else bisect.bisect_left(days, start_day)
+        hi = self.count if end_day is None else bisect.bisect_right(days, end_day)
+        return lo, hi
+
+    def records(self, start_day=None, end_day=None):
+        if self.mm is None:
+            return
+        lo, hi = self.bounds(start_day, end_day)
+        view = memoryview(self.mm)[HEADER.size + lo * RECORD.size:HEADER.size + hi * RECORD.size]
+        try:
+            for day, title_id, seconds in RECORD.iter_unpack(view):
+                if (start_day is None or day >= start_day) and (end_day is None or day <= end_day):
+                    yield day, title_id, seconds
+        finally:
+            view.release()
+
+    def totals_by_title(self, start_day=None, end_day=None):
+        totals = [0] * len(self.titles)
+        for day, title_id, seconds in self.records(start_day, end_day):
+            totals[title_id] += seconds
+        return {title: totals[i] for i, title in enumerate(self.titles) if totals[i]}
+
+    def entries(self):
+        for day, title_id, seconds in self.records():
+            yield ordinal_to_date(day), self.titles[title_id], seconds
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class _DayIndex:
+    # Sequence view over record days, so bisect can search the mapped file directly
+    def __init__(self, log):
+        self.log = log
+
+    def __len__(self):
+        return self.log.count
+
+    def __getitem__(self, i):
+        return self.log.day_at(i)
+
+class BinaryStorage:
+    def __init__(self, path=BIN_FILE, titles_path=TITLES_FILE, lock_path=BIN_LOCK_PATH):
+        self.path = path
+        self.titles_path = titles_path
+        self.lock_path = lock_path
+        self.title_ids = {}
+        self.titles_size = -1
+
+    def load_titles(self):
+        # Only re-read the dictionary when another instance appended to it
+        size = os.path.getsize(self.titles_path) if os.path.exists(self.titles_path) else 0
+        if size != self.titles_size:
+            self.title_ids = {title: i for i, title in enumerate(read_titles(self.titles_path))}
+            self.titles_size = size
+
+    def title_id(self, title):
+        title_id = self.title_ids.get(title)
+        if title_id is None:
+            title_id = self.title_ids[title] = len(self.title_ids)
+            with open(self.titles_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(title) + "\n")
+            self.titles_size = os.path.getsize(self.titles_path)
+        return title_id
+
+    def append(self, records):
+        with open(self.path, "r+b" if os.path.exists(self.path) else "w+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size < HEADER.size:
+                f.seek(0)
+                f.truncate()
+                f.write(HEADER.pack(MAGIC, VERSION, FLAG_SORTED))
+                flags, last_day = FLAG_SORTED, 0
+            else:
+                f.seek(0)
+                flags = HEADER.unpack(f.read(HEADER.size))[2]
+                last_day = 0
+                if size >= HEADER.size + RECORD.size:
+                    f.seek(-RECORD.size, os.SEEK_END)
+                    last_day = RECORD.unpack(f.read(RECORD.size))[0]
+                f.seek(0, os.SEEK_END)
+            for record in records:
+                if record[0] < last_day:
+                    flags &= ~FLAG_SORTED
+                last_day = record[0]
+                f.write(RECORD.pack(*record))
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, flags))
+
+    def add(self, date_str, title, seconds):
+        self.import_entries([(date_str, title, seconds)])
+
+    def import_entries(self, entries):
+        # Every save ends up here; the first one brings the timelog.csv history along
+        from filelock import FileLock
+        with FileLock(self.lock_path), stats.timer("save.binary"):
+            entries = list(entries)
+            if not os.path.exists(self.path):
+                entries = sorted(iter_timelog(FILE), key=lambda e: date_to_ordinal(e[0])) + entries
+            self.write_entries(entries)
+
+    def write_entries(self, entries):
+        # Lock held by the caller
+        self.load_titles()
+        self.append([(date_to_ordinal(d), self.title_id(t), int(s)) for d, t, s in entries])
+
+    def entries(self):
+        log = BinaryLog(self.path, self.titles_path)
+        try:
+            yield from log.entries()
+        finally:
+            log.close()
+
+    def close(self):
+        pass
+
+# === CONVERSION ===
+
+def csv_to_binary(csv_path=FILE, path=BIN_FILE, titles_path=TITLES_FILE):
+    for p in (path, titles_path):
+        if os.path.exists(p):
+            os.remove(p)
+    storage = BinaryStorage(path, titles_path)
+    # Every header column gets an id, even ones without any time, so the round trip is lossless
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        columns = next(csv.reader(f), [])
+    storage.load_titles()
+    for title in sorted(c for c in columns if c != "Date"):
+        storage.title_id(title)
+    from filelock import FileLock
+    entries = sorted(iter_timelog(csv_path), key=lambda e: date_to_ordinal(e[0]))
+    with FileLock(storage.lock_path):
+        storage.write_entries(entries)
+    return len(entries)
+
+def binary_to_csv(csv_path=FILE, path=BIN_FILE, titles_path=TITLES_FILE):
+    log = BinaryLog(path, titles_path)
+    try:
+        write_wide_csv(log.entries(), csv_path, titles=log.titles)
+        return len(log)
+    finally:
+        log.close()
+
+# === RUN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert between timelog.csv and the binary time log, or query it.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("from-csv", help="build timelog.bin from a wide timelog.csv").add_argument("csv", nargs="?", default=FILE)
+    sub.add_parser("to-csv", help="write the binary log as a wide timelog.csv").add_argument("csv", nargs="?", default=FILE)
+    totals_parser = sub.add_parser("totals", help="per-title totals, optionally for a date range")
+    totals_parser.add_argument("--from", dest="start", help="first date (dd.mm.yyyy)")
+    totals_parser.add_argument("--to", dest="end", help="last date (dd.mm.yyyy)")
+    args = parser.parse_args()
+
+    if args.command == "from-csv":
+        print(f"Wrote {csv_to_binary(args.csv)} records to {BIN_FILE}.")
+    elif args.command == "to-csv":
+        print(f"Wrote {binary_to_csv(args.csv)} records to {args.csv}.")
+    else:
+        log = BinaryLog()
+        totals = log.totals_by_title(
+            date_to_ordinal(args.start) if args.start else None,
+            date_to_ordinal(args.end) if args.end else None)
+        log.close()
+        for title, seconds in sorted(totals.items()):
+            print(f"{format_seconds(seconds):>10}  {title}")
@@ -0,0 +1,130 @@
+import glob
+import json
+import os
+import time
+import datetime
+from storage import format_seconds, DATE_FORMAT
+
+# Unsaved timer state is written to timelog.checkpoint.<pid>.<token>.json every
+# CHECKPOINT_INTERVAL seconds (temp file + rename, so a crash never leaves half a file). Each running instance
+# holds a lock next to its checkpoint (taken with the first checkpoint, so startup
+# skips it); a checkpoint whose lock is free belongs to an instance that died without
+# saving and can be recovered.
+
+CHECKPOINT_PATTERN = "timelog.checkpoint.*.json"
+CHECKPOINT_INTERVAL = 30  # s
+FSYNC_EVERY = 10  # checkpoints; the others are left to the OS to flush
+
+# The random token keeps a new instance that got a crashed one's pid from taking (and
+# overwriting) its checkpoint
+INSTANCE = f"{os.getpid()}.{os.urandom(4).hex()}"
+
+def checkpoint_path():
+    return f"timelog.checkpoint.{INSTANCE}.json"
+
+def write_atomic(path, data, fsync=False):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class Checkpointer:
+    def __init__(self, engine, schedule, cancel, interval=CHECKPOINT_INTERVAL, fsync_every=FSYNC_EVERY):
+        self.engine = engine
+        self.schedule = schedule
+        self.cancel = cancel
+        self.interval = interval
+        self.fsync_every = fsync_every
+        self.path = checkpoint_path()
+        self.lock = None
+        self.job = None
+        self.written = 0
+        self.last = None
+
+    def start(self):
+        self.job = self.schedule(int(self.interval * 1000), self.tick)
+
+    def tick(self):
+        self.write()
+        self.job = self.schedule(int(self.interval * 1000), self.tick)
+
+    def write(self):
+        # Whole seconds only, and nothing is written while nothing changed
+        totals = {title: int(seconds) for title, seconds in self.engine.snapshot().items() if int(seconds) > 0}
+        if totals == self.last:
+            return
+        if self.lock is None:
+            from filelock import FileLock
+            self.lock = FileLock(self.path + ".lock")
+            self.lock.acquire()
+        self.written += 1
+        write_atomic(self.path, {
+            "pid": os.getpid(),
+            "date": datetime.datetime.now().strftime(DATE_FORMAT),
+            "written": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "totals": totals,
+        }, fsync=self.written % self.fsync_every == 0)
+        self.last = totals
+
+    def stop(self, keep=False):
+        # Clean shutdown: everything was saved, so the checkpoint goes away. With
+        # keep=True (the last save failed) it stays for the next start to recover.
+        if self.job is not None:
+            self.cancel(self.job)
+            self.job = None
+        if not keep and os.path.exists(self.path):
+            os.remove(self.path)
+        if self.lock is None:
+            return
+        self.lock.release()
+        if os.path.exists(self.lock.lock_file):
+            try:
+                os.remove(self.lock.lock_file)
+            except OSError:
+                pass
+
+def find_orphans():
+    # Checkpoints of instances that are no longer running, with their unsaved totals
+    orphans = []
+    for path in glob.glob(CHECKPOINT_PATTERN):
+        if path == checkpoint_path():
+            continue
+        from filelock import FileLock, Timeout
+        lock = FileLock(path + ".lock")
+        try:
+            lock.acquire(timeout=0)
+        except Timeout:
+            continue  # still running
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {"totals": {}}
+        if data.get("totals"):
+            orphans.append((path, lock, data))
+        else:
+            discard(path, lock)
+    return orphans
+
+def discard(path, lock):
+    if os.path.exists(path):
+        os.remove(path)
+    release(lock)
+
+def release(lock):
+    # Lets go of an orphan without touching its checkpoint
+    lock.release()
+    try:
+        os.remove(lock.lock_file)
+    except OSError:
+        pass
+
+def describe(orphans):
+    lines = []
+    for _, _, data in orphans:
+        for title, seconds in data["totals"].items():
+            lines.append(f"{data.get('date', '?')}  {title}: {format_seconds(seconds)}")
+    return "\n".join(lines)
@@ -0,0 +1,140 @@
+import json
+import os
+from storage import DEFAULT_STORAGE
+
+CONFIG_FILE = "config.json"
+CONFIG_LOCK_PATH = "config.json.lock"
+DEFAULT_TARGET = "Photoshop"
+WATCH_INTERVAL = 2000  # ms between config.json stat checks
+PROFILE_ENV = "TIMELOG_PROFILE"
+
+# config.json is shared by every instance. Top-level keys are the defaults (and what
+# v5 reads); "profiles": {"name": {...}} overrides them per instance, selected with
+# --profile NAME or TIMELOG_PROFILE. Reads come from an in-process cache that is
+# only refreshed when the file's mtime/size change. Writes take a lock, re-read the
+# file and change only the given keys, then replace the file atomically, so
+# instances never overwrite each other's settings. watch() tells an instance when
+# another one changed the file.
+
+class ConfigStore:
+    def __init__(self, path=CONFIG_FILE, lock_path=CONFIG_LOCK_PATH):
+        self.path = path
+        self.lock_path = lock_path
+        self.cached = {}
+        self.signature = None
+        self.listeners = []
+
+    def file_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def refresh(self):
+        # Re-reads the file only if it changed; returns True when it did
+        signature = self.file_signature()
+        if signature == self.signature:
+            return False
+        data = {}
+        if signature is not None:
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+            except Exception:
+                data = {}
+        self.cached = data if isinstance(data, dict) else {}
+        self.signature = signature
+        return True
+
+    def data(self):
+        self.refresh()
+        return self.cached
+
+    def settings(self, profile=None):
+        # Top-level settings with the profile's overrides on top
+        data = self.data()
+        settings = {key: value for key, value in data.items() if key != "profiles"}
+        if profile:
+            settings.update(data.get("profiles", {}).get(profile, {}))
+        return settings
+
+    def update(self, changes, profile=None):
+        from filelock import FileLock
+        with FileLock(self.lock_path):
+            self.signature = None
+            data = dict(self.data())
+            if profile:
+                profiles = dict(data.get("profiles", {}))
+                profiles[profile] = {**profiles.get(profile, {}), **changes}
+                data["profiles"] = profiles
+            else:
+                data.update(changes)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+            self.cached = data
+            self.signature = self.file_signature()
+        self.notify()
+
+    def notify(self):
+        for listener in list(self.listeners):
+            listener()
+
+    def watch(self, schedule, callback, cancel=None, interval=WATCH_INTERVAL):
+        # Calls callback() after this or any other instance changed config.json; other
+        # instances are noticed with one stat() every `interval` ms. Returns a stop function.
+        self.listeners.append(callback)
+        job = [None]
+
+        def poll():
+            if self.refresh():
+                self.notify()
+            job[0] = schedule(interval, poll)
+
+        def stop():
+            if callback in self.listeners:
+                self.listeners.remove(callback)
+            if job[0] is not None and cancel is not None:
+                cancel(job[0])
+            job[0] = None
+
+        self.refresh()
+        job[0] = schedule(interval, poll)
+        return stop
+
+store = ConfigStore()
+
+def current_profile(argv=()):
+    # --profile NAME on the command line, else TIMELOG_PROFILE, else the top-level settings
+    argv = list(argv)
+    if "--profile" in argv and argv.index("--profile") + 1 < len(argv):
+        return argv[argv.index("--profile") + 1]
+    return os.environ.get(PROFILE_ENV) or None
+
+def load_config(profile=None):
+    settings = store.settings(profile)
+    return settings.get("target_window", DEFAULT_TARGET), settings.get("timer_title", ""), settings.get("storage", DEFAULT_STORAGE)
+
+def load_targets(profile=None):
+    # Optional "targets": [{"target": "Photoshop", "title": "Client A"}, ...] tracks several apps at once
+    try:
+        return [(t.get("target", ""), t["title"]) for t in store.settings(profile).get("targets", []) if t.get("title", "").strip()]
+    except Exception:
+        return []
+
+def load_setting(key, default, profile=None):
+    return store.settings(profile).get(key, default)
+
+def save_config(target, title, storage=DEFAULT_STORAGE, profile=None):
+    store.update({
+        "target_window": target,
+        "timer_title": title,
+        "storage": storage
+    }, profile)
+
+def tracking_rules(target, title, targets):
+    if targets:
+        return targets
+    return [(target, title)]
@@ -0,0 +1,154 @@
+import argparse
+import signal
+import sys
+import time
+import config
+from config import load_config, load_targets, load_setting, tracking_rules, current_profile
+from checkpoint import Checkpointer, find_orphans, discard, CHECKPOINT_INTERVAL
+from engine import Scheduler, TrackingEngine, Ticker, MAX_TICK
+from focus import idle_seconds
+from storage import get_storage, format_seconds
+import stats
+
+CHECK_INTERVAL = 1000  # ms, only used by the polling fallback
+
+# Headless tracker: same engine as the window, no Tk. Saves on SIGUSR1 (Ctrl+Break on
+# Windows), optionally every N minutes, and always on SIGINT/SIGTERM before exiting.
+
+def main():
+    parser = argparse.ArgumentParser(description="Track time without a window.")
+    parser.add_argument("--save-every", type=float, default=0, help="also save every N minutes")
+    parser.add_argument("--verbose", action="store_true", help="print every tracking change")
+    parser.add_argument("--profile", default=current_profile(), help=f"settings profile in config.json (default: ${config.PROFILE_ENV})")
+    parser.add_argument("--stats", action="store_true", help=f"collect timing stats and write them to {stats.STATS_FILE} on every save")
+    args = parser.parse_args()
+    if args.stats:
+        stats.enable()
+
+    target_window, timer_title, storage_name = load_config(args.profile)
+    targets = load_targets(args.profile)
+    if not targets and not timer_title.strip():
+        parser.error("set timer_title (or targets) in config.json, there is no dialog to ask for one")
+
+    scheduler = Scheduler()
+    engine = TrackingEngine(tracking_rules(target_window, timer_title, targets), lambda: get_storage(storage_name))
+    checkpointer = None
+    exit_code = [0]
+
+    def log(message):
+        if args.verbose:
+            print(time.strftime("%H:%M:%S"), message, flush=True)
+
+    def on_change():
+        active = engine.tracker.active
+        log(f"tracking '{active}'" if active is not None else "paused")
+        # Nothing to draw; ticks only watch for suspend gaps while time is running
+        if ticker is None:
+            return
+        if engine.tracking:
+            ticker.activity()
+        else:
+            ticker.stop()
+
+    def on_config_change():
+        # Only with a profile: the top-level keys belong to whichever instance saved
+        # last. Storage changes take effect on the next start.
+        if not args.profile:
+            return
+        target, title, _ = load_config(args.profile)
+        rules = tracking_rules(target, title, load_targets(args.profile))
+        if rules != engine.tracker.matcher.rules and any(t.strip() for _, t in rules):
+            log("config changed, new tracking rules")
+            engine.set_rules(rules)
+
+    def on_gap(seconds):
+        log(f"not counting {format_seconds(seconds)} the machine was asleep")
+        engine.skip_gap(seconds)
+
+    def save():
+        for title, seconds in engine.save().items():
+            log(f"saving {format_seconds(seconds)} for '{title}'")
+        scheduler.after(100, report_saves)
+
+    def report_saves():
+        results = engine.poll_saves()
+        if results and checkpointer is not None:
+            checkpointer.write()
+        for saved, failed, error in results:
+            if failed:
+                print(f"Save failed: {error}", file=sys.stderr, flush=True)
+        if engine.saving():
+            scheduler.after(100, report_saves)
+        elif stats.ENABLED:
+            stats.dump()
+
+    def save_periodically():
+        save()
+        scheduler.after(int(args.save_every * 60000), save_periodically)
+
+    def shutdown():
+        nonlocal checkpointer
+        stop_watch()
+        if ticker is not None:
+            ticker.stop()
+        save()
+        engine.close()
+        # The scheduler stops here, so report_saves never sees the final save
+        failed = False
+        for saved, failed_totals, error in engine.poll_saves():
+            if failed_totals:
+                failed = True
+                print(f"Save failed: {error}", file=sys.stderr, flush=True)
+        if failed:
+            # The failed time is back on the engine; keep it in a checkpoint so the
+            # next start recovers it
+            if checkpointer is None:
+                checkpointer = Checkpointer(engine, scheduler.after, scheduler.after_cancel)
+            checkpointer.write()
+            print(f"Unsaved time kept in {checkpointer.path}", file=sys.stderr, flush=True)
+        if checkpointer is not None:
+            checkpointer.stop(keep=failed)
+        if stats.ENABLED:
+            stats.dump()
+        exit_code[0] = 1 if failed else 0
+        scheduler.stop()
+
+    # Suspend gaps can only be told apart from a busy machine where the input idle time
+    # is known, and a gap is SUSPEND_GAP long, so a slow tick is enough
+    ticker = None
+    if idle_seconds() is not None:
+        ticker = Ticker(scheduler.after, scheduler.after_cancel, lambda: None, anchor=engine.tick_anchor,
+                        on_gap=on_gap, min_interval=MAX_TICK)
+    engine.on_change = on_change
+
+    save_signal = getattr(signal, "SIGUSR1", None) or getattr(signal, "SIGBREAK", None)
+    if save_signal is not None:
+        signal.signal(save_signal, lambda signum, frame: scheduler.call_soon(save))
+    for stop_signal in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(stop_signal, lambda signum, frame: scheduler.call_soon(shutdown))
+    if args.save_every:
+        scheduler.after(int(args.save_every * 60000), save_periodically)
+
+    provider = engine.start(scheduler.after, scheduler.after_cancel, CHECK_INTERVAL)
+    if hasattr(provider, "wait"):
+        scheduler.wait = provider.wait
+
+    # Without anyone to ask, time left behind by a crashed instance is saved to the log
+    for path, lock, data in find_orphans():
+        log(f"recovering unsaved time from {path}")
+        engine.save_recovered(data["date"], data["totals"])
+        discard(path, lock)
+    scheduler.after(100, report_saves)
+
+    stop_watch = config.store.watch(scheduler.after, on_config_change, scheduler.after_cancel)
+    interval = load_setting("checkpoint_interval", CHECKPOINT_INTERVAL, args.profile)
+    if interval:
+        checkpointer = Checkpointer(engine, scheduler.after, scheduler.after_cancel, interval)
+        checkpointer.start()
+    log("started")
+    scheduler.run()
+    return exit_code[0]
+
+# === RUN ===
+if __name__ == "__main__":
+    sys.exit(main())
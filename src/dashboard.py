@@ -0,0 +1,184 @@
+import tkinter as tk
+import sys
+import config
+from config import load_config, load_targets, load_setting, tracking_rules, current_profile
+from checkpoint import Checkpointer, find_orphans, discard, release, describe, CHECKPOINT_INTERVAL
+from engine import TrackingEngine, Ticker
+from render import Renderer
+import stats
+from storage import get_storage, format_seconds
+
+CHECK_INTERVAL = 1000  # ms, only used by the polling fallback
+SAVE_POLL_INTERVAL = 100  # ms
+
+# One window for many timers: a row per titled target in config.json, all fed by
+# one engine and redrawn by one ticker. Each tick is a single pass over the rows,
+# and only labels whose text or colour changed are touched, so with dozens of
+# timers a tick still updates one or two widgets.
+
+def titled_rules(profile):
+    target_window, timer_title, _ = load_config(profile)
+    return [(target, title) for target, title in tracking_rules(target_window, timer_title, load_targets(profile)) if title.strip()]
+
+class Dashboard:
+    def __init__(self, root, profile=None):
+        self.root = root
+        self.root.title("Timers")
+        self.root.resizable(False, False)
+
+        self.rows_frame = tk.Frame(root)
+        self.rows_frame.pack(padx=10, pady=(10, 5))
+        self.rows = {}  # title -> (name label, time label)
+        self.row_state = {}  # title -> (whole seconds, colour) last drawn
+
+        self.total_label = tk.Label(root, text="", font=("Helvetica", 12, "bold"))
+        self.total_label.pack(pady=(0, 10))
+
+        button_frame = tk.Frame(root)
+        button_frame.pack(pady=(0, 10))
+        self.pause_button = tk.Button(button_frame, text="Pause", command=self.toggle_pause)
+        self.pause_button.grid(row=0, column=0, padx=5)
+        self.save_button = tk.Button(button_frame, text="Save", command=self.save)
+        self.save_button.grid(row=0, column=1, padx=5)
+
+        # State
+        self.profile = profile
+        self.storage_name = load_config(profile)[2]
+        rules = titled_rules(profile)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.paused = False
+        self.renderer = Renderer()
+        self.engine = TrackingEngine(rules, lambda: get_storage(self.storage_name), on_change=self.refresh_state)
+        self.ticker = Ticker(self.root.after, self.root.after_cancel, self.render,
+                             anchor=self.engine.tick_anchor, on_gap=self.engine.skip_gap,
+                             visible=lambda: self.root.state() != "iconic")
+        for _, title in rules:
+            self.add_row(title)
+        if not rules:
+            tk.Label(self.rows_frame, text="Add targets with titles to config.json").grid(row=0, column=0)
+
+        self.render()
+        self.engine.start(self.root.after, self.root.after_cancel, CHECK_INTERVAL)
+
+        self.checkpointer = None
+        self.recover_checkpoints()
+        interval = load_setting("checkpoint_interval", CHECKPOINT_INTERVAL, profile)
+        if interval:
+            self.checkpointer = Checkpointer(self.engine, self.root.after, self.root.after_cancel, interval)
+            self.checkpointer.start()
+        self.stop_watch = config.store.watch(self.root.after, self.on_config_change, self.root.after_cancel)
+
+    def on_config_change(self):
+        # New targets get a row; rows of removed ones stay until the next start. Like
+        # v6, only a profile follows changes made elsewhere.
+        if not self.profile:
+            return
+        rules = titled_rules(self.profile)
+        if rules != self.engine.tracker.matcher.rules:
+            for _, title in rules:
+                self.add_row(title)
+            self.engine.set_rules(rules)
+
+    def add_row(self, title):
+        if title in self.rows:
+            return
+        row = len(self.rows)
+        name_label = tk.Label(self.rows_frame, text=title, font=("Helvetica", 10), anchor=tk.W)
+        name_label.grid(row=row, column=0, sticky=tk.W, padx=(0, 15))
+        time_label = tk.Label(self.rows_frame, text="", font=("Helvetica", 10, "bold"), fg="gray")
+        time_label.grid(row=row, column=1, sticky=tk.E)
+        self.rows[title] = (name_label, time_label)
+
+    def recover_checkpoints(self):
+        orphans = find_orphans()
+        if not orphans:
+            return
+        from tkinter import messagebox
+        answer = messagebox.askyesnocancel(
+            "Recover unsaved time",
+            "A previous session ended without saving:\n\n" + describe(orphans) +
+            "\n\nYes: save it to the log now\nNo: put it back on the timers\nCancel: ask again next time")
+        for path, lock, data in orphans:
+            if answer is None:
+                # Cancelled or closed: the checkpoint stays for the next start
+                release(lock)
+                continue
+            if answer is True:
+                self.engine.save_recovered(data["date"], data["totals"])
+            elif answer is False:
+                self.engine.restore(data["totals"])
+            discard(path, lock)
+        if answer is True:
+            self.root.after(SAVE_POLL_INTERVAL, self.check_saves)
+
+    def refresh_state(self):
+        if self.engine.tracking:
+            self.ticker.activity()
+        else:
+            self.ticker.stop()
+        self.render()
+
+    def render(self):
+        # One pass per tick: every row is compared, only changed labels are configured
+        stats.count("render.passes")
+        snapshot = self.engine.snapshot()
+        for title in snapshot:
+            if title not in self.rows:
+                self.add_row(title)
+        active = self.engine.tracker.active
+        for title, (name_label, time_label) in self.rows.items():
+            colour = "black" if title == active else "gray"
+            state = (int(snapshot.get(title, 0)), colour)
+            if self.row_state.get(title) == state:
+                continue
+            self.row_state[title] = state
+            self.renderer.set(name_label, fg=colour)
+            self.renderer.set(time_label, text=format_seconds(state[0]), fg=colour)
+        self.renderer.set(self.total_label, text=f"Total: {format_seconds(sum(snapshot.values()))}")
+        if active is not None:
+            self.renderer.set_title(self.root, f"Timers – {active}")
+        else:
+            self.renderer.set_title(self.root, "Timers (Paused)" if self.paused else "Timers")
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+        self.renderer.set(self.pause_button, text="Resume" if self.paused else "Pause")
+        self.engine.set_paused(self.paused)
+
+    def save(self):
+        was_busy = self.engine.saving()
+        self.engine.save()
+        self.render()
+        self.renderer.set(self.save_button, text="Saving…")
+        if not was_busy:
+            self.root.after(SAVE_POLL_INTERVAL, self.check_saves)
+
+    def check_saves(self):
+        from tkinter import messagebox
+        results = self.engine.poll_saves()
+        if results and self.checkpointer is not None:
+            self.checkpointer.write()
+        for saved, failed, error in results:
+            if failed:
+                self.render()
+                messagebox.showerror("Save failed", f"Could not save the time ({self.storage_name}): {error}")
+        if self.engine.saving():
+            self.root.after(SAVE_POLL_INTERVAL, self.check_saves)
+        else:
+            self.renderer.set(self.save_button, text="Save")
+
+    def on_close(self):
+        self.stop_watch()
+        self.ticker.stop()
+        self.engine.close()
+        if self.checkpointer is not None:
+            self.checkpointer.stop()
+        if stats.ENABLED:
+            stats.dump()
+        self.root.destroy()
+
+# === RUN ===
+if __name__ == "__main__":
+    root = tk.Tk()
+    app = Dashboard(root, current_profile(sys.argv))
+    root.mainloop()
@@ -0,0 +1,250 @@
+import collections
+import datetime
+import heapq
+import itertools
+import threading
+import time
+import stats
+from focus import start_focus_provider, idle_seconds
+from intervals import IntervalLog
+from rollup import RollupStorage
+from storage import BackgroundWriter, DATE_FORMAT
+from tracker import MultiTargetTracker
+
+MAX_WAIT = 1.0  # s, upper bound for waits that cannot be woken up early (message pumps)
+RESYNC_AFTER = 5.0  # s the wall clock may move against the monotonic clock before re-anchoring
+MIN_TICK = 1.0  # s
+MAX_TICK = 15.0  # s, slowest tick rate once backed off
+IDLE_AFTER = 60.0  # s without input before ticks back off
+SUSPEND_GAP = 30.0  # s a tick may be late before the gap counts as suspend
+
+class Scheduler:
+    # GUI-free stand-in for root.after/root.after_cancel, so the engine runs the same
+    # way under Tk and headless. `wait(timeout)` can be swapped for a message pump.
+    def __init__(self, wait=None):
+        self.jobs = []
+        self.cancelled = set()
+        self.soon = collections.deque()
+        self.ids = itertools.count(1)
+        self.wakeup = threading.Event()
+        self.wait = wait
+        self.running = False
+
+    def after(self, ms, fn):
+        job = next(self.ids)
+        heapq.heappush(self.jobs, (time.monotonic() + ms / 1000, job, fn))
+        self.wakeup.set()
+        return job
+
+    def after_cancel(self, job):
+        self.cancelled.add(job)
+
+    def call_soon(self, fn):
+        # Safe from signal handlers and other threads
+        self.soon.append(fn)
+        self.wakeup.set()
+
+    def run(self):
+        self.running = True
+        while self.running:
+            self.wakeup.clear()
+            while self.soon:
+                self.soon.popleft()()
+            now = time.monotonic()
+            while self.jobs and self.jobs[0][0] <= now:
+                _, job, fn = heapq.heappop(self.jobs)
+                if job in self.cancelled:
+                    self.cancelled.discard(job)
+                    continue
+                fn()
+            if not self.running or self.soon:
+                continue
+            timeout = max(self.jobs[0][0] - time.monotonic(), 0) if self.jobs else None
+            if self.wait is not None:
+                self.wait(MAX_WAIT if timeout is None else min(timeout, MAX_WAIT))
+            else:
+                self.wakeup.wait(timeout)
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+
+class Ticker:
+    # Calls on_tick on whole-second boundaries of anchor() (the running bucket's start,
+    # on time.monotonic()), so the shown seconds flip on time and a late tick never
+    # delays the next one. The interval doubles up to MAX_TICK while the window is
+    # hidden or the user is idle, and activity() brings it back to `min_interval`. A
+    # tick that is SUSPEND_GAP late while the user was idle just as long means the
+    # machine was asleep; on_gap(seconds) drops that time.
+    def __init__(self, schedule, cancel, on_tick, anchor=None, on_gap=None, visible=None, idle=idle_seconds,
+                 min_interval=MIN_TICK):
+        self.schedule = schedule
+        self.cancel = cancel
+        self.on_tick = on_tick
+        self.anchor = anchor
+        self.on_gap = on_gap
+        self.visible = visible
+        self.idle = idle
+        self.min_interval = min_interval
+        self.interval = min_interval
+        self.due = 0
+        self.job = None
+
+    @property
+    def running(self):
+        return self.job is not None
+
+    def activity(self):
+        self.interval = self.min_interval
+        self.arm()
+
+    def arm(self):
+        self.stop()
+        now = time.monotonic()
+        anchor = now if self.anchor is None else self.anchor()
+        delay = self.interval - (now - anchor) % self.interval
+        if delay < 0.01:
+            delay += self.interval
+        self.due = now + delay
+        self.job = self.schedule(max(int(delay * 1000), 1), self.fire)
+
+    def fire(self):
+        self.job = None
+        now = time.monotonic()
+        late = now - self.due
+        stats.count("tick")
+        stats.observe("tick.drift", late)
+        idle = self.idle()
+        if late > SUSPEND_GAP and self.on_gap is not None and idle is not None and idle >= late:
+            stats.count("tick.suspend_gaps")
+            self.on_gap(late)
+        self.on_tick()
+        if (self.visible is not None and not self.visible()) or (idle is not None and idle > IDLE_AFTER):
+            self.interval = min(self.interval * 2, MAX_TICK)
+        else:
+            self.interval = self.min_interval
+        self.arm()
+
+    def stop(self):
+        if self.job is not None:
+            self.cancel(self.job)
+            self.job = None
+
+class TrackingEngine:
+    # Everything the tracker does without a window: focus events in, per-title time
+    # accrued, saves handed to the background writer. `on_change` is called whenever
+    # the running bucket changes so a UI can redraw. `open_storage` is only called on
+    # the first save, so starting up never touches the log; saves also keep the
+    # week/month/year rollups up to date. Time is accounted on time.monotonic(),
+    # anchored to the wall clock, so clock adjustments never change durations.
+    def __init__(self, rules, open_storage, on_change=None):
+        self.tracker = MultiTargetTracker(rules)
+        self.offset = time.time() - time.monotonic()
+        self.open_storage = open_storage
+        self.storage = None
+        self.writer = None
+        self.interval_log = IntervalLog()
+        self.on_change = on_change
+        self.focus_provider = None
+        self.paused = False
+
+    @property
+    def tracking(self):
+        return self.tracker.tracking
+
+    def start(self, schedule, cancel=None, interval=1000):
+        self.focus_provider = start_focus_provider(self.on_focus_change, schedule, cancel, interval)
+        return self.focus_provider
+
+    def now(self):
+        # Wall time that advances with the monotonic clock. Only a big jump between the
+        # two (a clock change, or a suspend the monotonic clock did not count)
+        # re-anchors it, and the running bucket is shifted along so it keeps its duration.
+        mono = time.monotonic()
+        offset = time.time() - mono
+        if abs(offset - self.offset) > RESYNC_AFTER:
+            self.tracker.shift(offset - self.offset)
+            self.offset = offset
+        return mono + self.offset
+
+    def tick_anchor(self):
+        # Start of the running bucket on time.monotonic(), for Ticker
+        return self.tracker.start_time - self.offset
+
+    def skip_gap(self, seconds):
+        self.tracker.skip(seconds, self.now())
+
+    def on_focus_change(self, window_title, timestamp=None):
+        if self.tracker.on_focus_change(window_title, self.now() if timestamp is None else timestamp):
+            self.changed()
+
+    def changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def set_paused(self, paused):
+        self.paused = paused
+        self.tracker.set_paused(paused, self.now())
+        self.changed()
+
+    def set_rules(self, rules):
+        self.tracker.set_rules(rules, self.now())
+        self.changed()
+
+    def rename(self, old, new):
+        self.tracker.rename(old, new)
+
+    def total(self):
+        return self.tracker.total(self.now())
+
+    def snapshot(self):
+        return self.tracker.snapshot(self.now())
+
+    def get_writer(self):
+        if self.writer is None:
+            self.storage = RollupStorage(self.open_storage())
+            self.writer = BackgroundWriter(self.storage)
+        return self.writer
+
+    def save(self, keep_empty_title=None):
+        # Queues everything accrued so far under the day it was tracked on and appends the
+        # intervals to the interval log; returns the queued seconds per title
+        by_day, intervals = self.tracker.take(self.now())
+        if not by_day and keep_empty_title is not None:
+            by_day = {(datetime.datetime.now().strftime(DATE_FORMAT), keep_empty_title): 0}
+        totals = {}
+        for (date_str, title), seconds in by_day.items():
+            self.get_writer().submit(date_str, title, seconds)
+            totals[title] = totals.get(title, 0) + seconds
+        self.interval_log.append(intervals)
+        return totals
+
+    def restore(self, totals):
+        # Unsaved time from a crashed session goes back on the clock
+        for title, seconds in totals.items():
+            self.tracker.add(title, seconds)
+        self.changed()
+
+    def save_recovered(self, date_str, totals):
+        for title, seconds in totals.items():
+            self.get_writer().submit(date_str, title, seconds)
+
+    def poll_saves(self):
+        # Finished saves; anything that failed goes back on the clock so nothing is lost
+        if self.writer is None:
+            return []
+        results = self.writer.poll()
+        for saved, failed, error in results:
+            for (date_str, title), seconds in failed.items():
+                self.tracker.add(title, seconds)
+        return results
+
+    def saving(self):
+        return self.writer is not None and self.writer.busy()
+
+    def close(self):
+        if self.focus_provider is not None:
+            self.focus_provider.stop()
+        if self.writer is not None:
+            self.writer.close()
+            self.storage.close()
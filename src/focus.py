@@ -0,0 +1,188 @@
+import sys
+import stats
+
+# Focus providers call callback(window_title, timestamp) whenever the foreground
+# window changes (and once on start), so the tracker only does work on real switches.
+# Live providers pass timestamp=None and leave the time to the receiver's clock.
+
+class FocusProvider:
+    def __init__(self):
+        self.callback = None
+        self.title = ""
+
+    def start(self, callback):
+        self.callback = callback
+        self.emit(self.read_title())
+
+    def stop(self):
+        self.callback = None
+
+    def read_title(self):
+        return self.title
+
+    def emit(self, title, timestamp=None):
+        self.title = title
+        stats.count("focus.changes")
+        if self.callback is not None:
+            self.callback(title, timestamp)
+
+def get_active_window_title():
+    import win32gui
+    return win32gui.GetWindowText(win32gui.GetForegroundWindow())
+
+def idle_seconds():
+    # Seconds since the last keyboard/mouse input, or None where that is unknown
+    if sys.platform != "win32":
+        return None
+    import ctypes
+    from ctypes import wintypes
+
+    class LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+
+    info = LASTINPUTINFO(ctypes.sizeof(LASTINPUTINFO), 0)
+    if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+        return None
+    return ((ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000
+
+class PollingFocusProvider(FocusProvider):
+    # Fallback: samples the foreground title every `interval` ms through `schedule`
+    # (e.g. root.after) and only reports it when it differs from the last sample.
+    def __init__(self, schedule, cancel=None, interval=1000, get_title=get_active_window_title):
+        super().__init__()
+        self.schedule = schedule
+        self.cancel = cancel
+        self.interval = interval
+        self.get_title = get_title
+        self.job = None
+
+    def read_title(self):
+        return self.get_title()
+
+    def start(self, callback):
+        super().start(callback)
+        self.job = self.schedule(self.interval, self.poll)
+
+    def poll(self):
+        stats.count("focus.read_title")
+        title = self.get_title()
+        if title != self.title:
+            self.emit(title)
+        self.job = self.schedule(self.interval, self.poll)
+
+    def stop(self):
+        if self.job is not None and self.cancel is not None:
+            self.cancel(self.job)
+        self.job = None
+        super().stop()
+
+class WinEventFocusProvider(FocusProvider):
+    # Windows only: SetWinEventHook on foreground and title changes. Out-of-context
+    # hooks are delivered through the message loop of the installing thread, which
+    # is the Tk thread when started from the app.
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    OBJID_WINDOW = 0
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    QS_ALLINPUT = 0x04FF
+    PM_REMOVE = 0x0001
+
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        from ctypes import wintypes
+        self.ctypes = ctypes
+        self.user32 = ctypes.windll.user32
+        self.msg = wintypes.MSG()
+        self.buffer = ctypes.create_unicode_buffer(512)
+        self.proc_type = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        self.user32.SetWinEventHook.restype = wintypes.HANDLE
+        self.user32.SetWinEventHook.argtypes = [
+            wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, self.proc_type,
+            wintypes.DWORD, wintypes.DWORD, wintypes.DWORD]
+        self.user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+        self.proc = None
+        self.hooks = []
+
+    def read_title(self):
+        stats.count("focus.read_title")
+        hwnd = self.user32.GetForegroundWindow()
+        self.user32.GetWindowTextW(hwnd, self.buffer, len(self.buffer))
+        return self.buffer.value
+
+    def start(self, callback):
+        # Keep a reference to the ctypes callback, otherwise it gets garbage collected
+        self.proc = self.proc_type(self.on_event)
+        # Focusing the tracker's own window has to stop the running target like any
+        # other window; only its own title updates (every redraw) are skipped
+        for event, flags in ((self.EVENT_SYSTEM_FOREGROUND, self.WINEVENT_OUTOFCONTEXT),
+                             (self.EVENT_OBJECT_NAMECHANGE, self.WINEVENT_OUTOFCONTEXT | self.WINEVENT_SKIPOWNPROCESS)):
+            hook = self.user32.SetWinEventHook(event, event, 0, self.proc, 0, 0, flags)
+            if not hook:
+                self.stop()
+                raise OSError("SetWinEventHook failed")
+            self.hooks.append(hook)
+        super().start(callback)
+
+    def on_event(self, hook, event, hwnd, id_object, id_child, thread, event_time):
+        if event == self.EVENT_OBJECT_NAMECHANGE:
+            if id_object != self.OBJID_WINDOW or hwnd != self.user32.GetForegroundWindow():
+                return
+        title = self.read_title()
+        if title != self.title:
+            self.emit(title)
+
+    def wait(self, timeout):
+        # Message pump for headless use (Tk pumps messages itself): sleeps until a
+        # message arrives or `timeout` seconds pass, then dispatches the hook callbacks
+        self.user32.MsgWaitForMultipleObjects(0, None, False, int(timeout * 1000), self.QS_ALLINPUT)
+        msg = self.ctypes.byref(self.msg)
+        while self.user32.PeekMessageW(msg, 0, 0, 0, self.PM_REMOVE):
+            self.user32.TranslateMessage(msg)
+            self.user32.DispatchMessageW(msg)
+
+    def stop(self):
+        for hook in self.hooks:
+            self.user32.UnhookWinEvent(hook)
+        self.hooks = []
+        super().stop()
+
+class ScriptedFocusProvider(FocusProvider):
+    # Stand-in for tests and benchmarks: replays (timestamp, title) pairs on demand
+    def __init__(self, script=()):
+        super().__init__()
+        self.script = list(script)
+
+    def play(self, until=None):
+        # Replays the script, or only the part up to `until`; the rest stays queued
+        while self.script and (until is None or self.script[0][0] <= until):
+            timestamp, title = self.script.pop(0)
+            self.emit(title, timestamp)
+
+def can_read_titles():
+    import importlib.util
+    return sys.platform == "win32" and importlib.util.find_spec("win32gui") is not None
+
+def make_focus_provider(schedule, cancel=None, interval=1000):
+    if sys.platform == "win32":
+        try:
+            return WinEventFocusProvider()
+        except Exception:
+            pass
+    if not can_read_titles():
+        # No window titles here (Linux build machines, services): a provider that
+        # always reports "", which is enough for catch-all rules
+        return FocusProvider()
+    return PollingFocusProvider(schedule, cancel, interval)
+
+def start_focus_provider(callback, schedule, cancel=None, interval=1000):
+    provider = make_focus_provider(schedule, cancel, interval)
+    try:
+        provider.start(callback)
+    except OSError:
+        provider = PollingFocusProvider(schedule, cancel, interval)
+        provider.start(callback)
+    return provider
@@ -0,0 +1,116 @@
+import bisect
+import csv
+import datetime
+import os
+from storage import format_seconds, DATE_FORMAT
+
+# Every stretch of tracked time is kept as a (start, end, title) interval in epoch
+# seconds. Daily totals are derived from them (split at local midnight), and
+# IntervalIndex answers "how much time between X and Y" with two binary searches.
+
+INTERVALS_FILE = "timelog.intervals.csv"
+INTERVALS_HEADER = ["Start", "End", "Title"]
+
+def next_midnight(timestamp):
+    day = datetime.datetime.fromtimestamp(timestamp).date() + datetime.timedelta(days=1)
+    return datetime.datetime.combine(day, datetime.time()).timestamp()
+
+def split_by_day(intervals):
+    # {(date_str, title): seconds}, with intervals that cross midnight split between the days
+    totals = {}
+    for start, end, title in intervals:
+        while start < end:
+            cut = min(end, next_midnight(start))
+            key = (datetime.datetime.fromtimestamp(start).strftime(DATE_FORMAT), title)
+            totals[key] = totals.get(key, 0) + cut - start
+            start = cut
+    return totals
+
+class IntervalLog:
+    def __init__(self, path=INTERVALS_FILE):
+        self.path = path
+
+    def append(self, intervals):
+        intervals = [i for i in intervals if i[1] > i[0]]
+        if not intervals:
+            return
+        is_new = not os.path.exists(self.path)
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(INTERVALS_HEADER)
+            writer.writerows([f"{start:.3f}", f"{end:.3f}", title] for start, end, title in intervals)
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if row == INTERVALS_HEADER:
+                    continue
+                yield float(row[0]), float(row[1]), row[2]
+
+class IntervalIndex:
+    # Intervals sorted by start, plus the running maximum of their ends. For a query
+    # [a, b) only intervals starting before b can overlap (bisect on starts), and the
+    # first one that can still end after a is found by bisecting the running maximum.
+    # Without overlapping intervals (one tracker) nothing in between is skipped.
+    def __init__(self, intervals):
+        self.intervals = sorted(intervals)
+        self.starts = [start for start, _, _ in self.intervals]
+        self.max_ends = []
+        running = float("-inf")
+        for _, end, _ in self.intervals:
+            running = max(running, end)
+            self.max_ends.append(running)
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def overlapping(self, a, b, title=None):
+        lo = bisect.bisect_right(self.max_ends, a)
+        hi = bisect.bisect_left(self.starts, b)
+        for i in range(lo, hi):
+            start, end, interval_title = self.intervals[i]
+            if end > a and (title is None or interval_title == title):
+                yield start, end, interval_title
+
+    def time_in_range(self, a, b, title=None):
+        # {title: seconds} inside [a, b), clipping intervals at the edges
+        totals = {}
+        for start, end, interval_title in self.overlapping(a, b, title):
+            totals[interval_title] = totals.get(interval_title, 0) + min(end, b) - max(start, a)
+        return totals
+
+    def daily_totals(self):
+        return split_by_day(self.intervals)
+
+def parse_moment(text):
+    for fmt in (DATE_FORMAT + " %H:%M", DATE_FORMAT):
+        try:
+            return datetime.datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            pass
+    raise ValueError(f"expected dd.mm.yyyy or 'dd.mm.yyyy HH:MM', got '{text}'")
+
+# === RUN ===
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Query recorded tracking intervals.")
+    parser.add_argument("--from", dest="start", type=parse_moment, help="'dd.mm.yyyy HH:MM' or dd.mm.yyyy")
+    parser.add_argument("--to", dest="end", type=parse_moment, help="'dd.mm.yyyy HH:MM' or dd.mm.yyyy (exclusive)")
+    parser.add_argument("--title")
+    parser.add_argument("--daily", action="store_true", help="print totals per day and title instead")
+    args = parser.parse_args()
+
+    index = IntervalIndex(IntervalLog().read())
+    if args.daily:
+        for (date_str, title), seconds in sorted(index.daily_totals().items(), key=lambda kv: (kv[0][0][6:], kv[0][0][3:5], kv[0][0][:2], kv[0][1])):
+            print(f"{date_str}  {format_seconds(seconds):>10}  {title}")
+    else:
+        totals = index.time_in_range(
+            float("-inf") if args.start is None else args.start,
+            float("inf") if args.end is None else args.end,
+            args.title)
+        for title, seconds in sorted(totals.items()):
+            print(f"{format_seconds(seconds):>10}  {title}")
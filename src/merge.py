@@ -0,0 +1,72 @@
+import argparse
+import concurrent.futures
+import csv
+import heapq
+import itertools
+import os
+import shutil
+import tempfile
+from storage import iter_timelog, sum_entries, date_to_ordinal, ordinal_to_date, format_seconds
+
+# Merges the wide timelog.csv files of many machines into one. Each file is
+# normalised in a worker process into a temporary long file sorted newest day first;
+# the sorted files are then k-way merged, so only one day's row is in memory while
+# the consolidated log is written. Columns are the union of all headers.
+
+MERGED_FILE = "timelog.merged.csv"
+
+def read_header(path):
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return [c for c in next(csv.reader(f), []) if c != "Date"]
+
+def normalise(path, tmp_dir):
+    # Runs in a worker: one file in, (sorted long file, header columns, cell count) out
+    totals = sum_entries(iter_timelog(path))
+    records = sorted((-date_to_ordinal(d), t, s) for (d, t), s in totals.items())
+    fd, out = tempfile.mkstemp(suffix=".csv", dir=tmp_dir)
+    with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(records)
+    return out, read_header(path), len(records)
+
+def read_sorted(path):
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for key, title, seconds in csv.reader(f):
+            yield int(key), title, int(seconds)
+
+def merge_files(paths, out=MERGED_FILE, workers=None):
+    # Returns (days written, columns)
+    tmp_dir = tempfile.mkdtemp(prefix="timelog-merge-")
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(normalise, paths, itertools.repeat(tmp_dir)))
+        columns = sorted(set(itertools.chain.from_iterable(header for _, header, _ in parts)))
+        merged = heapq.merge(*(read_sorted(p) for p, _, _ in parts))
+
+        days = 0
+        tmp_out = out + ".tmp"
+        with open(tmp_out, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["Date"] + columns)
+            writer.writeheader()
+            for key, records in itertools.groupby(merged, key=lambda r: r[0]):
+                row = {}
+                for _, title, seconds in records:
+                    row[title] = row.get(title, 0) + seconds
+                row = {title: format_seconds(seconds) for title, seconds in row.items()}
+                row["Date"] = ordinal_to_date(-key)
+                writer.writerow(row)
+                days += 1
+        os.replace(tmp_out, out)
+        return days, columns
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# === RUN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge timelog.csv files from several machines into one.")
+    parser.add_argument("files", nargs="+", help="wide timelog.csv files to merge")
+    parser.add_argument("--out", default=MERGED_FILE)
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    days, columns = merge_files(args.files, args.out, args.workers)
+    print(f"Merged {len(args.files)} files into {args.out}: {days} days, {len(columns)} titles.")
@@ -0,0 +1,24 @@
+import stats
+
+# Remembers what every widget currently shows, so a redraw pass can hand over all
+# values and only the widgets whose text or colour really changed get a config()
+# call. A pass costs one dict comparison per widget instead of a Tk round trip.
+
+class Renderer:
+    def __init__(self):
+        self.shown = {}
+
+    def set(self, widget, **options):
+        shown = self.shown.setdefault(widget, {})
+        changed = {key: value for key, value in options.items() if shown.get(key) != value}
+        if changed:
+            widget.config(**changed)
+            shown.update(changed)
+            stats.count("render.updates")
+
+    def set_title(self, root, text):
+        shown = self.shown.setdefault(root, {})
+        if shown.get("title") != text:
+            root.title(text)
+            shown["title"] = text
+            stats.count("render.updates")
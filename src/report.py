@@ -0,0 +1,94 @@
+import argparse
+import datetime
+import functools
+import heapq
+from rollup import period_keys, ROLLUP_PERIODS
+from config import load_config, current_profile
+from storage import get_storage, empty_storage_message, iter_timelog, format_seconds, DATE_FORMAT, STORAGE_BACKENDS
+
+PERIODS = ("title", "week", "month", "year")
+
+# Everything here consumes (date, title, seconds) entries one at a time, so memory
+# only grows with the number of groups in the report, never with the size of the log.
+
+@functools.lru_cache(maxsize=1024)
+def parse_date(date_str):
+    return datetime.datetime.strptime(date_str, DATE_FORMAT).date()
+
+def period_key(date_str, title, by):
+    if by == "title":
+        return title
+    if by in ROLLUP_PERIODS:
+        return period_keys(date_str)[by]
+    raise ValueError(f"Unknown period '{by}'. Choose from: {', '.join(PERIODS)}")
+
+def filter_entries(entries, title=None, start=None, end=None):
+    for date_str, entry_title, seconds in entries:
+        if title is not None and entry_title != title:
+            continue
+        if start is not None or end is not None:
+            day = parse_date(date_str)
+            if start is not None and day < start:
+                continue
+            if end is not None and day > end:
+                continue
+        yield date_str, entry_title, seconds
+
+def totals_by(entries, by):
+    totals = {}
+    for date_str, title, seconds in entries:
+        key = period_key(date_str, title, by)
+        totals[key] = totals.get(key, 0) + seconds
+    return totals
+
+def top_titles(entries, n):
+    return heapq.nlargest(n, totals_by(entries, "title").items(), key=lambda kv: kv[1])
+
+def iter_report_lines(totals):
+    if not totals:
+        return
+    width = max(len(key) for key in totals)
+    for key in sorted(totals):
+        yield f"{key:<{width}}  {format_seconds(totals[key])}"
+
+def open_entries(storage_name=None, csv_path=None):
+    # Without a name, the storage set in config.json
+    if csv_path:
+        return iter_timelog(csv_path), None
+    storage = get_storage(storage_name or load_config(current_profile())[2])
+    return storage.entries(), storage
+
+# === RUN ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report tracked time totals.")
+    parser.add_argument("--by", default="title", choices=PERIODS)
+    parser.add_argument("--top", type=int, default=0, help="only show the N titles with the most time")
+    parser.add_argument("--title", help="only count this title")
+    parser.add_argument("--from", dest="start", help="first date to count (dd.mm.yyyy)")
+    parser.add_argument("--to", dest="end", help="last date to count (dd.mm.yyyy)")
+    parser.add_argument("--storage", choices=sorted(STORAGE_BACKENDS), help="default: the storage setting in config.json")
+    parser.add_argument("--csv", help="read a wide timelog.csv instead of the storage")
+    args = parser.parse_args()
+
+    name = args.storage or load_config(current_profile())[2]
+    entries, storage = open_entries(name, args.csv)
+    entries = filter_entries(
+        entries,
+        title=args.title,
+        start=parse_date(args.start) if args.start else None,
+        end=parse_date(args.end) if args.end else None,
+    )
+
+    if args.top:
+        top = top_titles(entries, args.top)
+        for title, seconds in top:
+            print(f"{format_seconds(seconds):>10}  {title}")
+    else:
+        top = totals_by(entries, args.by)
+        for line in iter_report_lines(top):
+            print(line)
+    if not top:
+        print(f"No tracked time in {args.csv}." if args.csv else empty_storage_message(name))
+
+    if storage is not None:
+        storage.close()
@@ -0,0 +1,171 @@
+import datetime
+import functools
+import os
+import stats
+from storage import get_storage, empty_storage_message, iter_timelog, date_to_ordinal, format_seconds, DATE_FORMAT, STORAGE_BACKENDS
+
+# Running totals per title per ISO week, month and year in timelog.rollup.db. Every
+# save adds its delta with one upsert per period, so period totals are a primary-key
+# lookup instead of a scan over the whole log. `python rollup.py --rebuild`
+# recomputes them from the log (needed after editing it by hand or saving with v5);
+# the first save after an upgrade does the same automatically.
+
+ROLLUP_DB = "timelog.rollup.db"
+ROLLUP_PERIODS = ("week", "month", "year")
+
+@functools.lru_cache(maxsize=1024)
+def period_keys(date_str):
+    day = datetime.date.fromordinal(date_to_ordinal(date_str))
+    year, week, _ = day.isocalendar()
+    return {"week": f"{year}-W{week:02d}", "month": f"{day.year}-{day.month:02d}", "year": str(day.year)}
+
+def current_keys():
+    return period_keys(datetime.date.today().strftime(DATE_FORMAT))
+
+class RollupStore:
+    def __init__(self, path=ROLLUP_DB):
+        self.path = path
+        self.conn = None
+
+    def exists(self):
+        return self.conn is not None or os.path.exists(self.path)
+
+    def connect(self):
+        if self.conn is None:
+            import sqlite3
+            self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS rollup (
+                    period TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    seconds INTEGER NOT NULL,
+                    PRIMARY KEY (period, key, title)
+                )""")
+        return self.conn
+
+    def add(self, entries):
+        rows = []
+        for date_str, title, seconds in entries:
+            for period, key in period_keys(date_str).items():
+                rows.append((period, key, title, int(seconds)))
+        conn = self.connect()
+        with stats.timer("rollup.add"), conn:
+            conn.executemany(
+                "INSERT INTO rollup (period, key, title, seconds) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(period, key, title) DO UPDATE SET seconds = seconds + excluded.seconds",
+                rows)
+
+    def rebuild(self, entries):
+        totals = {}
+        for date_str, title, seconds in entries:
+            for period, key in period_keys(date_str).items():
+                totals[(period, key, title)] = totals.get((period, key, title), 0) + seconds
+        conn = self.connect()
+        with conn:
+            conn.execute("DELETE FROM rollup")
+            conn.executemany(
+                "INSERT INTO rollup (period, key, title, seconds) VALUES (?, ?, ?, ?)",
+                ((p, k, t, int(s)) for (p, k, t), s in totals.items()))
+        return len(totals)
+
+    def total(self, period, key, titles=None):
+        # Seconds in one period, for the given titles or all of them
+        if not self.exists():
+            return 0
+        conn = self.connect()
+        if titles is None:
+            row = conn.execute("SELECT SUM(seconds) FROM rollup WHERE period = ? AND key = ?", (period, key)).fetchone()
+            return row[0] or 0
+        total = 0
+        for title in set(titles):
+            row = conn.execute(
+                "SELECT seconds FROM rollup WHERE period = ? AND key = ? AND title = ?", (period, key, title)).fetchone()
+            if row is not None:
+                total += row[0]
+        return total
+
+    def totals(self, period, key=None, title=None):
+        # {(key, title): seconds}, optionally limited to one period key and/or title
+        if not self.exists():
+            return {}
+        query = "SELECT key, title, seconds FROM rollup WHERE period = ?"
+        params = [period]
+        if key is not None:
+            query += " AND key = ?"
+            params.append(key)
+        if title is not None:
+            query += " AND title = ?"
+            params.append(title)
+        return {(k, t): s for k, t, s in self.connect().execute(query, params)}
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+class RollupStorage:
+    # Storage wrapper that keeps the rollups in step with every successful save. A
+    # failed rollup update never fails the save itself; --rebuild repairs it.
+    def __init__(self, storage, rollups=None):
+        self.storage = storage
+        self.rollups = RollupStore() if rollups is None else rollups
+
+    def add(self, date_str, title, seconds):
+        self.storage.add(date_str, title, seconds)
+        self.update([(date_str, title, seconds)])
+
+    def import_entries(self, entries):
+        entries = list(entries)
+        self.storage.import_entries(entries)
+        self.update(entries)
+
+    def update(self, entries):
+        try:
+            if self.rollups.exists():
+                self.rollups.add(entries)
+            else:
+                self.rollups.rebuild(self.storage.entries())
+        except Exception:
+            stats.count("rollup.errors")
+
+    def entries(self):
+        return self.storage.entries()
+
+    def close(self):
+        self.rollups.close()
+        self.storage.close()
+
+# === RUN ===
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Query or rebuild the per-week/month/year totals.")
+    parser.add_argument("--by", default="week", choices=ROLLUP_PERIODS)
+    parser.add_argument("--key", help="one period, e.g. 2026-W42, 2026-10 or 2026 (default: the current one)")
+    parser.add_argument("--all", action="store_true", help="every period instead of only the current one")
+    parser.add_argument("--title")
+    parser.add_argument("--rebuild", action="store_true", help="recompute everything from the log")
+    parser.add_argument("--storage", choices=sorted(STORAGE_BACKENDS), help="default: the storage setting in config.json")
+    parser.add_argument("--csv", help="rebuild from a wide timelog.csv instead of the storage")
+    args = parser.parse_args()
+
+    rollups = RollupStore()
+    if args.rebuild:
+        if args.csv:
+            count = rollups.rebuild(iter_timelog(args.csv))
+        else:
+            from config import load_config, current_profile
+            name = args.storage or load_config(current_profile())[2]
+            storage = get_storage(name)
+            count = rollups.rebuild(storage.entries())
+            storage.close()
+            if not count:
+                print(empty_storage_message(name))
+        print(f"Rebuilt {count} rollup rows in {ROLLUP_DB}.")
+    else:
+        key = None if args.all else (args.key or current_keys()[args.by])
+        totals = rollups.totals(args.by, key, args.title)
+        for (k, title), seconds in sorted(totals.items()):
+            print(f"{k:<9}  {format_seconds(seconds):>10}  {title}")
+    rollups.close()
@@ -0,0 +1,124 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+# Counters and latency histograms for the hot paths. Off by default; set
+# TIMELOG_STATS=1 to turn them on. While off every call returns right after one
+# global check, and timer() hands out a shared no-op context manager.
+
+ENABLED = os.environ.get("TIMELOG_STATS", "") not in ("", "0")
+STATS_FILE = os.environ.get("TIMELOG_STATS_FILE", "timelog.stats.json")
+BUCKETS_MS = [0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+lock = threading.Lock()
+counters = {}
+histograms = {}
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    def percentile(self, p):
+        # Upper bound of the bucket that holds the p-th percentile
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else None,
+            "min_ms": self.min,
+            "max_ms": self.max,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "buckets_ms": dict(zip([f"<={b}" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"], self.buckets)),
+        }
+
+class Timer:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+
+class NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+NULL_TIMER = NullTimer()
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = on
+
+def count(name, n=1):
+    if not ENABLED:
+        return
+    with lock:
+        counters[name] = counters.get(name, 0) + n
+
+def observe(name, seconds):
+    if not ENABLED:
+        return
+    with lock:
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram()
+        histogram.add(seconds * 1000)
+
+def timer(name):
+    return Timer(name) if ENABLED else NULL_TIMER
+
+def snapshot():
+    with lock:
+        return {
+            "counters": dict(counters),
+            "histograms": {name: h.to_dict() for name, h in histograms.items()},
+        }
+
+def reset():
+    with lock:
+        counters.clear()
+        histograms.clear()
+
+def dump(path=STATS_FILE):
+    data = snapshot()
+    data["pid"] = os.getpid()
+    data["time"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+    return path
+
+def format_stats():
+    data = snapshot()
+    lines = [f"{name}: {n}" for name, n in sorted(data["counters"].items())]
+    for name, h in sorted(data["histograms"].items()):
+        lines.append(f"{name}: n={h['count']} mean={h['mean_ms']:.2f}ms p99<={h['p99_ms']}ms max={h['max_ms']:.2f}ms")
+    return "\n".join(lines) if lines else "No stats recorded yet."
@@ -0,0 +1,570 @@
+import bisect
+import csv
+import datetime
+import os
+import queue
+import threading
+import stats
+
+FILE = "timelog.csv"
+LOCK_PATH = "timelog.csv.lock"
+JOURNAL_FILE = "timelog.journal.csv"
+JOURNAL_LOCK_PATH = "timelog.journal.csv.lock"
+DB_FILE = "timelog.db"
+DATE_FORMAT = "%d.%m.%Y"
+LONG_HEADER = ["Date", "Title", "Seconds"]
+DEFAULT_STORAGE = "journal"
+
+# Durations are whole seconds everywhere; text cells are H:MM:SS with as many hours
+# as needed (v5 reads those too). parse_duration also reads what str(timedelta)
+# wrote past 24 hours ("1 day, 2:03:04") and plain seconds, and returns None instead
+# of raising for anything else.
+
+def format_seconds(seconds):
+    seconds = int(seconds)
+    if seconds < 0:
+        return "-" + format_seconds(-seconds)
+    minutes, s = divmod(seconds, 60)
+    h, m = divmod(minutes, 60)
+    return f"{h}:{m:02d}:{s:02d}"
+
+def parse_duration(text):
+    text = text.strip()
+    days = 0
+    if "," in text:
+        day_part, _, text = text.partition(",")
+        count, _, unit = day_part.strip().partition(" ")
+        if unit not in ("day", "days") or not count.lstrip("-").isdecimal():
+            return None
+        days = int(count)
+        text = text.strip()
+    h, sep, rest = text.partition(":")
+    if not sep:
+        return int(text) + days * 86400 if text.isdecimal() else None
+    m, sep, s = rest.partition(":")
+    s = s.partition(".")[0]  # str(timedelta) adds microseconds when there are any
+    if not (sep and h.isdecimal() and m.isdecimal() and s.isdecimal()):
+        return None
+    return days * 86400 + int(h) * 3600 + int(m) * 60 + int(s)
+
+def parse_cell(cell, date_str, title):
+    seconds = parse_duration(cell)
+    if seconds is None:
+        raise ValueError(f"Unreadable time '{cell}' for '{title}' on {date_str}; fix it in {FILE} first")
+    return seconds
+
+def date_to_ordinal(date_str):
+    # Same as strptime(date_str, DATE_FORMAT) for dd.mm.yyyy, without the format parsing
+    day, month, year = date_str.split(".")
+    return datetime.date(int(year), int(month), int(day)).toordinal()
+
+def ordinal_to_date(day):
+    return datetime.date.fromordinal(day).strftime(DATE_FORMAT)
+
+def iter_wide_csv(path=FILE):
+    # Yields (date, title, seconds) for every filled cell of a wide timelog.csv
+    if not os.path.exists(path):
+        return
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            for title, cell in row.items():
+                if title == "Date" or not (cell or "").strip():
+                    continue
+                yield row["Date"], title, parse_cell(cell, row["Date"], title)
+
+def iter_timelog(path=FILE):
+    # Like iter_wide_csv, but timelog.csv itself also yields the days compacted into
+    # the archive (archive.py builds on this module, so it is imported here)
+    if os.path.abspath(path) != os.path.abspath(FILE):
+        yield from iter_wide_csv(path)
+        return
+    from archive import iter_archive, archived_before
+    cutoff = archived_before()
+    yield from iter_archive()
+    for entry in iter_wide_csv(path):
+        if not cutoff or date_to_ordinal(entry[0]) >= cutoff:
+            yield entry
+
+def sum_entries(entries):
+    totals = {}
+    for date_str, title, seconds in entries:
+        key = (date_str, title)
+        totals[key] = totals.get(key, 0) + seconds
+    return totals
+
+def pivot(entries, titles=()):
+    # Wide view of long (date, title, seconds) entries: one row per date, one column per title
+    totals = {}
+    for (date_str, title), seconds in sum_entries(entries).items():
+        totals.setdefault(date_str, {})[title] = seconds
+
+    titles = set(titles)
+    for day in totals.values():
+        titles.update(day)
+    ordered_fields = ["Date"] + sorted(titles)
+
+    rows = []
+    for date_str in sorted(totals, key=date_to_ordinal, reverse=True):
+        row = {title: format_seconds(s) for title, s in totals[date_str].items()}
+        row["Date"] = date_str
+        rows.append(row)
+    return ordered_fields, rows
+
+def write_wide_csv(entries, out=FILE, titles=()):
+    ordered_fields, rows = pivot(entries, titles)
+    with open(out, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=ordered_fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+# === JOURNAL ===
+# Long format (Date, Title, Seconds): every save appends one line, so a save no
+# longer depends on how much history there is. compact() folds repeated saves into
+# one row per (date, title); the wide timelog.csv is a pivot built on demand.
+
+class JournalStorage:
+    def __init__(self, path=JOURNAL_FILE, lock_path=JOURNAL_LOCK_PATH):
+        self.path = path
+        self.lock_path = lock_path
+
+    def add(self, date_str, title, seconds):
+        self.import_entries([(date_str, title, seconds)])
+
+    def import_entries(self, entries):
+        # Every save ends up here (the aggregator hands over whole batches): under the
+        # lock, so compact() cannot replace the file in between, and the first save
+        # brings the existing timelog.csv history along
+        from filelock import FileLock
+        lock = FileLock(self.lock_path)
+        with stats.timer("lock.wait"):
+            lock.acquire()
+        try:
+            with stats.timer("lock.hold"):
+                if not os.path.exists(self.path):
+                    self.create(iter_timelog(FILE))
+                with open(self.path, "a", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerows([d, t, int(s)] for d, t, s in entries)
+        finally:
+            lock.release()
+
+    def create(self, history):
+        # A new journal only appears once everything is written, so an import that
+        # fails halfway leaves nothing behind and is retried by the next save
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(LONG_HEADER)
+            writer.writerows([d, t, int(s)] for d, t, s in history)
+        os.replace(tmp_path, self.path)
+
+    def entries(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if row == LONG_HEADER:
+                    continue
+                date_str, title, seconds = row
+                yield date_str, title, int(seconds)
+
+    def compact(self):
+        from filelock import FileLock
+        with FileLock(self.lock_path):
+            totals = sum_entries(self.entries())
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(LONG_HEADER)
+                for (date_str, title), seconds in sorted(totals.items(), key=lambda kv: (date_to_ordinal(kv[0][0]), kv[0][1])):
+                    writer.writerow([date_str, title, seconds])
+            os.replace(tmp_path, self.path)
+
+    def close(self):
+        pass
+
+# === WIDE CSV ===
+# The classic v5 layout as the store itself (same file and lock, so v5 instances can
+# keep writing next to it). The parsed rows stay in memory between saves and are
+# only re-read when the file's inode, mtime or size show another writer touched it.
+# Rows are kept by day ordinal in a sorted list, so adding today is an append instead
+# of re-parsing and re-sorting every date on each save. Days older than the
+# retention period live in the archive (archive.py), so the file stays small.
+
+class WideCsvStorage:
+    def __init__(self, path=FILE, lock_path=LOCK_PATH):
+        self.path = path
+        self.lock_path = lock_path
+        self.rows = {}
+        self.days = []
+        self.fieldnames = set()
+        self.signature = None
+
+    def file_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def load(self):
+        signature = self.file_signature()
+        if signature is not None and signature == self.signature:
+            stats.count("csv.cache_hits")
+            return
+        stats.count("csv.reloads")
+        self.rows = {}
+        self.fieldnames = set()
+        if signature is not None:
+            with stats.timer("csv.parse"), open(self.path, "r", newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    self.rows[date_to_ordinal(row["Date"])] = row
+                self.fieldnames.update(reader.fieldnames or ())
+        # Rows of days that are already archived (left by an interrupted compaction)
+        # do not count and are dropped on the next write
+        from archive import archived_before
+        cutoff = archived_before()
+        for day in [day for day in self.rows if day < cutoff]:
+            del self.rows[day]
+        # The file is newest-first already, so this sort is a linear pass
+        self.days = sorted(self.rows)
+        self.signature = signature
+
+    def add(self, date_str, title, seconds):
+        self.merge([(date_str, title, seconds)])
+
+    def merge(self, entries):
+        from filelock import FileLock
+        lock = FileLock(self.lock_path)
+        with stats.timer("lock.wait"):
+            lock.acquire()
+        try:
+            with stats.timer("lock.hold"):
+                from archive import load_index, archive_entries, COMPACT_EVERY
+                self.load()
+                try:
+                    index = load_index()
+                    cutoff = index["compacted_before"] if index else 0
+                    late = []
+                    for date_str, title, seconds in entries:
+                        if cutoff and date_to_ordinal(date_str) < cutoff:
+                            late.append((date_str, title, seconds))
+                        else:
+                            self.merge_entry(date_str, title, seconds)
+                    if late:
+                        # Days that are archived already get a segment of their own
+                        archive_entries(late)
+                    if index and self.days:
+                        retention_cutoff = datetime.date.today().toordinal() - index["retention_days"]
+                        if self.days[0] < retention_cutoff - COMPACT_EVERY:
+                            self.archive_before(retention_cutoff, index["retention_days"])
+                    self.write()
+                except Exception:
+                    # Part of the batch may already be in self.rows; the next save
+                    # re-reads the file instead of writing that time out
+                    self.signature = None
+                    raise
+        finally:
+            lock.release()
+
+    def merge_entry(self, date_str, title, seconds):
+        self.fieldnames.add("Date")
+        self.fieldnames.add(title)
+        day = date_to_ordinal(date_str)
+        row = self.rows.get(day)
+        if row is None:
+            row = self.rows[day] = {"Date": date_str}
+            if not self.days or day > self.days[-1]:
+                self.days.append(day)
+            else:
+                bisect.insort(self.days, day)
+        prev_time = (row.get(title) or "").strip()
+        if prev_time:
+            # A cell that cannot be read fails the save instead of being overwritten
+            seconds += parse_cell(prev_time, date_str, title)
+        row[title] = format_seconds(seconds)
+
+    def write(self):
+        ordered_fields = ["Date"] + sorted(fn for fn in self.fieldnames if fn != "Date")
+        sorted_rows = (self.rows[day] for day in reversed(self.days))
+        tmp_path = self.path + ".tmp"
+        with stats.timer("csv.write"), open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=ordered_fields)
+            writer.writeheader()
+            writer.writerows(sorted_rows)
+        os.replace(tmp_path, self.path)
+        self.signature = self.file_signature()
+
+    def archive_before(self, cutoff, retention_days):
+        # Moves rows before `cutoff` into the archive; the lock is held, rows are
+        # loaded and the caller writes the file. Returns (days, entries) moved.
+        from archive import archive_entries
+        i = bisect.bisect_left(self.days, cutoff)
+        old_days, self.days = self.days[:i], self.days[i:]
+        entries = []
+        for day in old_days:
+            row = self.rows.pop(day)
+            for title, cell in row.items():
+                if title != "Date" and (cell or "").strip():
+                    entries.append((row["Date"], title, parse_cell(cell, row["Date"], title)))
+        if entries or old_days:
+            archive_entries(entries, compacted_before=cutoff, retention_days=retention_days)
+        # Titles whose time is all archived leave the header
+        self.fieldnames = {"Date"}
+        for row in self.rows.values():
+            self.fieldnames.update(title for title, cell in row.items() if (cell or "").strip())
+        stats.count("csv.archived_days", len(old_days))
+        return len(old_days), len(entries)
+
+    def import_entries(self, entries):
+        self.merge(entries)
+
+    def entries(self):
+        from archive import iter_archive
+        self.load()
+        if os.path.abspath(self.path) == os.path.abspath(FILE):
+            yield from iter_archive()
+        for day in list(self.days):
+            row = self.rows[day]
+            for title, cell in row.items():
+                if title == "Date" or not (cell or "").strip():
+                    continue
+                yield row["Date"], title, parse_cell(cell, row["Date"], title)
+
+    def migrate(self):
+        # Rewrites every cell as H:MM:SS; returns how many changed
+        from filelock import FileLock
+        changed = 0
+        with FileLock(self.lock_path):
+            self.load()
+            for row in self.rows.values():
+                for title, cell in row.items():
+                    if title == "Date" or not (cell or "").strip():
+                        continue
+                    text = format_seconds(parse_cell(cell, row["Date"], title))
+                    if text != cell:
+                        row[title] = text
+                        changed += 1
+            if changed:
+                self.write()
+        return changed
+
+    def close(self):
+        pass
+
+# === SQLITE ===
+# One row per (day, title); a save is a single indexed upsert and
+# concurrent instances are serialized by SQLite's own locking.
+
+class SqliteStorage:
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.conn = None
+
+    def connect(self):
+        if self.conn is None:
+            import sqlite3
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                if not self.history_imported(conn):
+                    self.import_history(conn)
+            except Exception:
+                conn.close()
+                raise
+            self.conn = conn
+        return self.conn
+
+    def history_imported(self, conn):
+        import sqlite3
+        try:
+            return conn.execute("SELECT 1 FROM meta WHERE key = 'history_imported'").fetchone() is not None
+        except sqlite3.OperationalError:
+            return False  # no meta table yet
+
+    def import_history(self, conn):
+        # timelog.csv is imported exactly once: under SQLite's write lock, and marked
+        # done in the same transaction, so two instances saving for the first time
+        # cannot both import it and a failed import is simply retried next time
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS timelog (
+                    day INTEGER NOT NULL,
+                    title TEXT NOT NULL,
+                    seconds INTEGER NOT NULL,
+                    PRIMARY KEY (day, title)
+                )""")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            if not self.history_imported(conn):
+                # A timelog.db from before the marker existed already holds the history
+                legacy = "timelog" in tables and "meta" not in tables and \
+                    conn.execute("SELECT 1 FROM timelog LIMIT 1").fetchone() is not None
+                if not legacy:
+                    conn.executemany(
+                        "INSERT INTO timelog (day, title, seconds) VALUES (?, ?, ?) "
+                        "ON CONFLICT(day, title) DO UPDATE SET seconds = seconds + excluded.seconds",
+                        ((date_to_ordinal(d), t, int(s)) for d, t, s in iter_timelog(FILE)))
+                conn.execute("INSERT INTO meta (key, value) VALUES ('history_imported', ?)",
+                             (datetime.datetime.now().isoformat(timespec="seconds"),))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def add(self, date_str, title, seconds):
+        conn = self.connect()
+        with stats.timer("save.sqlite"), conn:
+            conn.execute(
+                "INSERT INTO timelog (day, title, seconds) VALUES (?, ?, ?) "
+                "ON CONFLICT(day, title) DO UPDATE SET seconds = seconds + excluded.seconds",
+                (date_to_ordinal(date_str), title, int(seconds)))
+
+    def import_entries(self, entries):
+        conn = self.connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO timelog (day, title, seconds) VALUES (?, ?, ?) "
+                "ON CONFLICT(day, title) DO UPDATE SET seconds = seconds + excluded.seconds",
+                ((date_to_ordinal(d), t, int(s)) for d, t, s in entries))
+
+    def entries(self):
+        cursor = self.connect().execute("SELECT day, title, seconds FROM timelog ORDER BY day")
+        for day, title, seconds in cursor:
+            yield ordinal_to_date(day), title, seconds
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+def binary_storage():
+    # binstore builds on this module, so it is only imported when selected
+    from binstore import BinaryStorage
+    return BinaryStorage()
+
+STORAGE_BACKENDS = {
+    "csv": WideCsvStorage,
+    "journal": JournalStorage,
+    "sqlite": SqliteStorage,
+    "binary": binary_storage,
+}
+
+def empty_storage_message(name):
+    # For the command-line tools: a backend nothing was saved with yet is empty even
+    # when timelog.csv holds years of history
+    hint = f" ({FILE} has data, read it with --csv {FILE})" if name != "csv" and os.path.exists(FILE) else ""
+    return f"No tracked time in the {name} storage{hint}."
+
+def get_storage(name=DEFAULT_STORAGE):
+    # "aggregator+<backend>" sends saves through the shared aggregator process
+    if name.startswith("aggregator+"):
+        from aggregator import aggregator_storage
+        inner = name.split("+", 1)[1]
+        get_storage(inner).close()  # validates the name
+        return aggregator_storage(inner)
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}'. Choose from: {', '.join(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[name]()
+
+# === BACKGROUND WRITER ===
+# Saves are queued and written on a worker thread so the Tk loop never waits on
+# the storage. Everything queued while a write is running is folded into the next one.
+
+class BackgroundWriter:
+    def __init__(self, storage):
+        self.storage = storage
+        self.pending = queue.Queue()
+        self.done = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="timelog-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, date_str, title, seconds):
+        self.pending.put((date_str, title, int(seconds)))
+
+    def run(self):
+        while True:
+            batch = [self.pending.get()]
+            while True:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            self.write([item for item in batch if item is not None])
+            for _ in batch:
+                self.pending.task_done()
+            if stop:
+                return
+
+    def write(self, batch):
+        if not batch:
+            return
+        saved, failed, error = {}, {}, None
+        stats.count("save.batches")
+        stats.count("save.requests", len(batch))
+        totals = sum_entries(batch)
+        with stats.timer("save.write"):
+            try:
+                # One write for the whole batch (one lock and one rewrite for the csv)
+                self.storage.import_entries([(d, t, s) for (d, t), s in totals.items()])
+                saved = totals
+            except Exception:
+                # Find out which keys fail on their own, so one bad cell does not hold
+                # back the time of every other title
+                stats.count("save.retries")
+                for key, seconds in totals.items():
+                    try:
+                        self.storage.add(key[0], key[1], seconds)
+                        saved[key] = seconds
+                    except Exception as e:
+                        failed[key] = seconds
+                        error = e
+                        stats.count("save.errors")
+        self.done.put((saved, failed, error))
+
+    def busy(self):
+        return self.pending.unfinished_tasks > 0
+
+    def poll(self):
+        # Called from the Tk thread; returns finished (saved, failed, error) results
+        results = []
+        while True:
+            try:
+                results.append(self.done.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self, timeout=None):
+        self.pending.put(None)
+        self.thread.join(timeout)
+
+# === RUN ===
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from config import load_config, current_profile
+    parser = argparse.ArgumentParser(description="Export the stored time log as the wide timelog.csv layout.")
+    parser.add_argument("--storage", choices=sorted(STORAGE_BACKENDS), help="default: the storage setting in config.json")
+    parser.add_argument("--out", default=FILE)
+    parser.add_argument("--compact", action="store_true", help="fold repeated journal saves into one row per date and title first")
+    parser.add_argument("--migrate", action="store_true", help=f"rewrite the times in {FILE} as H:MM:SS (e.g. '1 day, 2:00:00' cells) and exit")
+    args = parser.parse_args()
+
+    if args.migrate:
+        print(f"Rewrote {WideCsvStorage().migrate()} cells in {FILE}.")
+    else:
+        name = args.storage or load_config(current_profile())[2]
+        if name == "csv" and os.path.abspath(args.out) == os.path.abspath(FILE):
+            sys.exit(f"The {name} storage is {FILE} itself; pass --storage or --out.")
+        storage = get_storage(name)
+        if args.compact and hasattr(storage, "compact"):
+            storage.compact()
+        entries = list(storage.entries())
+        storage.close()
+        if not entries and os.path.exists(args.out):
+            # An empty store (nothing saved with it yet) must not wipe the existing log
+            sys.exit(f"The {name} storage has no entries; leaving {args.out} as it is.")
+        write_wide_csv(entries, args.out)
+        print(f"Wrote {args.out} from the {name} storage.")
@@ -0,0 +1,105 @@
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+from engine import TrackingEngine
+from focus import ScriptedFocusProvider
+from storage import JournalStorage, WideCsvStorage, parse_duration, format_seconds, sum_entries, DATE_FORMAT
+from tracker import MultiTargetTracker
+
+# Runs without Windows or Tk: focus changes come from ScriptedFocusProvider with
+# explicit timestamps. `python -m unittest test_engine` from src/.
+
+RULES = [("Photoshop", "Design"), ("Firefox", "Research")]
+MIDNIGHT = datetime.datetime(2026, 1, 2).timestamp()
+
+class InTempDir(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp(prefix="timelog-test-")
+        os.chdir(self.dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+class TrackerTest(unittest.TestCase):
+    def replay(self, script, until=None):
+        tracker = MultiTargetTracker(RULES)
+        provider = ScriptedFocusProvider(script)
+        provider.start(tracker.on_focus_change)
+        provider.play(until)
+        return tracker, provider
+
+    def test_switches(self):
+        tracker, _ = self.replay([
+            (MIDNIGHT - 3600, "Adobe Photoshop"),
+            (MIDNIGHT - 3000, "Mozilla Firefox"),
+            (MIDNIGHT - 2900, "Terminal"),
+            (MIDNIGHT - 2000, "Adobe Photoshop"),
+        ])
+        self.assertEqual(tracker.active, "Design")
+        self.assertEqual(tracker.snapshot(MIDNIGHT - 1900), {"Design": 700, "Research": 100})
+
+    def test_pause(self):
+        script = [(MIDNIGHT - 600, "Adobe Photoshop"), (MIDNIGHT - 100, "Terminal")]
+        tracker, provider = self.replay(script, until=MIDNIGHT - 600)
+        tracker.set_paused(True, MIDNIGHT - 500)
+        self.assertIsNone(tracker.active)
+        tracker.set_paused(False, MIDNIGHT - 400)
+        provider.play()
+        self.assertEqual(tracker.snapshot(MIDNIGHT), {"Design": 400})
+
+    def test_midnight_split(self):
+        tracker, _ = self.replay([(MIDNIGHT - 300, "Adobe Photoshop"), (MIDNIGHT + 120, "Terminal")])
+        by_day, intervals = tracker.take(MIDNIGHT + 600)
+        self.assertEqual(by_day, {("01.01.2026", "Design"): 300, ("02.01.2026", "Design"): 120})
+        self.assertEqual(intervals, [(MIDNIGHT - 300, MIDNIGHT + 120, "Design")])
+
+class EngineTest(InTempDir):
+    def test_save(self):
+        engine = TrackingEngine(RULES, JournalStorage)
+        start = datetime.datetime.combine(datetime.date.today() - datetime.timedelta(days=1), datetime.time(12)).timestamp()
+        engine.focus_provider = ScriptedFocusProvider([(start, "Adobe Photoshop"), (start + 90, "Firefox"), (start + 120, "Terminal")])
+        engine.focus_provider.start(engine.on_focus_change)
+        engine.focus_provider.play()
+        self.assertEqual(engine.save(), {"Design": 90, "Research": 30})
+        engine.close()
+        self.assertEqual(engine.poll_saves()[0][1:], ({}, None))
+        day = datetime.datetime.fromtimestamp(start).strftime(DATE_FORMAT)
+        self.assertEqual(sum_entries(JournalStorage().entries()), {(day, "Design"): 90, (day, "Research"): 30})
+        self.assertEqual(engine.snapshot(), {})
+
+class DurationTest(InTempDir):
+    def test_parse(self):
+        cases = {
+            "1:02:03": 3723,
+            "25:00:00": 90000,
+            " 0:01:00 ": 60,
+            "1 day, 2:00:00": 93600,
+            "2 days, 0:00:01": 172801,
+            "0:00:01.500000": 1,
+            "90": 90,
+        }
+        for text, seconds in cases.items():
+            self.assertEqual(parse_duration(text), seconds, text)
+        for text in ("", "bad", "1 week, 0:00:00"):
+            self.assertIsNone(parse_duration(text), text)
+
+    def test_format_round_trip(self):
+        for seconds in (0, 59, 3600, 86400, 93600, 360000):
+            self.assertEqual(parse_duration(format_seconds(seconds)), seconds)
+
+    def test_migrate(self):
+        with open("timelog.csv", "w", newline="", encoding="utf-8") as f:
+            f.write('Date,A,B\n02.01.2026,"1 day, 2:00:00",0:01:00\n01.01.2026,,"2 days, 0:00:01"\n')
+        self.assertEqual(WideCsvStorage().migrate(), 2)
+        self.assertEqual(sum_entries(WideCsvStorage().entries()), {
+            ("02.01.2026", "A"): 93600, ("02.01.2026", "B"): 60, ("01.01.2026", "B"): 172801})
+        with open("timelog.csv", encoding="utf-8") as f:
+            self.assertIn("26:00:00", f.read())
+        self.assertEqual(WideCsvStorage().migrate(), 0)
+
+if __name__ == "__main__":
+    unittest.main()
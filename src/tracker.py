@@ -0,0 +1,145 @@
+import datetime
+import re
+from intervals import split_by_day
+from storage import DATE_FORMAT
+
+MATCH_CACHE_SIZE = 1024
+
+class TargetMatcher:
+    # All target substrings are compiled into one case-insensitive alternation, so a
+    # window title is matched against every rule in a single regex search. The leftmost
+    # match wins, ties go to the earlier rule. An empty target is the catch-all bucket.
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.fallback = None
+        parts = []
+        for i, (target, title) in enumerate(self.rules):
+            target = target.strip()
+            if not target:
+                if self.fallback is None:
+                    self.fallback = title
+                continue
+            parts.append(f"(?P<r{i}>{re.escape(target)})")
+        self.regex = re.compile("|".join(parts), re.IGNORECASE) if parts else None
+        self.cache = {}
+
+    def match(self, window_title):
+        if window_title in self.cache:
+            return self.cache[window_title]
+        m = self.regex.search(window_title) if self.regex is not None else None
+        title = self.rules[int(m.lastgroup[1:])][1] if m else self.fallback
+        if len(self.cache) >= MATCH_CACHE_SIZE:
+            self.cache.clear()
+        self.cache[window_title] = title
+        return title
+
+class MultiTargetTracker:
+    # Accrues time per title: at most one bucket runs at a time, and it only changes
+    # when the foreground window, the rules or the paused state change. Every stretch
+    # a bucket ran is also kept as a (start, end, title) interval until it is taken.
+    def __init__(self, rules=()):
+        self.matcher = TargetMatcher(rules)
+        self.totals = {}
+        self.intervals = []
+        self.active = None
+        self.start_time = 0
+        self.paused = False
+        self.window_title = ""
+
+    @property
+    def tracking(self):
+        return self.active is not None
+
+    def set_rules(self, rules, now):
+        self.stop(now)
+        self.matcher = TargetMatcher(rules)
+        return self.refresh(now)
+
+    def on_focus_change(self, window_title, now):
+        self.window_title = window_title
+        return self.refresh(now)
+
+    def set_paused(self, paused, now):
+        self.paused = paused
+        return self.refresh(now)
+
+    def refresh(self, now):
+        # Returns True when the running bucket changed
+        bucket = None if self.paused else self.matcher.match(self.window_title)
+        if bucket == self.active:
+            return False
+        self.stop(now)
+        if bucket is not None:
+            self.active = bucket
+            self.start_time = now
+        return True
+
+    def stop(self, now):
+        if self.active is not None:
+            self.totals[self.active] = self.totals.get(self.active, 0) + now - self.start_time
+            self.intervals.append((self.start_time, now, self.active))
+            self.active = None
+
+    def shift(self, delta):
+        # The clock was re-anchored by `delta`; the running bucket keeps its duration
+        if self.active is not None:
+            self.start_time += delta
+
+    def skip(self, gap, now):
+        # The last `gap` seconds were not real time (suspend): close the running
+        # bucket before them and restart it now
+        if self.active is not None:
+            end = max(self.start_time, now - gap)
+            self.totals[self.active] = self.totals.get(self.active, 0) + end - self.start_time
+            self.intervals.append((self.start_time, end, self.active))
+            self.start_time = now
+
+    def elapsed(self, title, now):
+        total = self.totals.get(title, 0)
+        if self.active == title:
+            total += now - self.start_time
+        return total
+
+    def total(self, now):
+        total = sum(self.totals.values())
+        if self.active is not None:
+            total += now - self.start_time
+        return total
+
+    def snapshot(self, now):
+        totals = dict(self.totals)
+        if self.active is not None:
+            totals[self.active] = totals.get(self.active, 0) + now - self.start_time
+        return totals
+
+    def take(self, now):
+        # Hands out everything accrued so far as {(date_str, title): seconds}, split at
+        # midnight, plus the intervals behind it, and starts over; the running bucket keeps
+        # running. Time without an interval (restored or re-added after a failed save)
+        # goes to today.
+        intervals = self.intervals
+        recorded = {}
+        for start, end, title in intervals:
+            recorded[title] = recorded.get(title, 0) + end - start
+        if self.active is not None:
+            intervals.append((self.start_time, now, self.active))
+            self.start_time = now
+        by_day = split_by_day(intervals)
+        today_str = datetime.datetime.fromtimestamp(now).strftime(DATE_FORMAT)
+        for title, seconds in self.totals.items():
+            rest = seconds - recorded.get(title, 0)
+            if rest > 0:
+                by_day[(today_str, title)] = by_day.get((today_str, title), 0) + rest
+        self.totals = {}
+        self.intervals = []
+        return by_day, intervals
+
+    def add(self, title, seconds):
+        self.totals[title] = self.totals.get(title, 0) + seconds
+
+    def rename(self, old, new):
+        if old in self.totals:
+            self.add(new, self.totals.pop(old))
+        self.intervals = [(start, end, new if title == old else title) for start, end, title in self.intervals]
+        if self.active == old:
+            self.active = new
@@ -0,0 +1,313 @@
+import time
+STARTED = time.perf_counter()
+import sys
+import tkinter as tk
+from tkinter import font
+import config
+from config import load_config, load_targets, load_setting, save_config, tracking_rules, current_profile
+from checkpoint import Checkpointer, find_orphans, discard, release, describe, CHECKPOINT_INTERVAL
+from engine import TrackingEngine, Ticker
+from render import Renderer
+from rollup import RollupStore, current_keys
+import stats
+from storage import get_storage, format_seconds
+
+CHECK_INTERVAL = 1000  # ms, only used by the polling fallback
+SAVE_POLL_INTERVAL = 100  # ms
+# Dialogs, locking and sqlite3 are only imported when first used, and the storage
+# backend is opened on the first save; `python v6.py --startup-time` prints how long
+# it takes until the window is drawn.
+
+class TimeTrackerApp:
+    def __init__(self, root, profile=None):
+        self.root = root
+        self.root.title("Paused")
+        self.root.resizable(False, False)
+
+        self.timer_font = font.Font(family="Helvetica", size=36, weight="bold")
+
+        # Optional title above timer
+        self.title_label = tk.Label(root, text="", font=("Helvetica", 12, "bold"))
+        self.title_label.pack(pady=(10, 0))
+
+        self.label = tk.Label(root, text="00:00:00", font=self.timer_font, fg="gray")
+        self.label.pack(padx=20, pady=(10, 10))
+
+        self.target_label = tk.Label(root, text="", font=("Helvetica", 10))
+        self.target_label.pack(pady=(0, 10))
+
+        self.week_label = tk.Label(root, text="", font=("Helvetica", 10), fg="gray")
+        self.week_label.pack(pady=(0, 10))
+
+        # Per-title times, only shown when several targets are configured
+        self.breakdown_label = tk.Label(root, text="", font=("Helvetica", 10), justify=tk.LEFT)
+        self.breakdown_label.pack(pady=(0, 10))
+
+        button_frame = tk.Frame(root)
+        button_frame.pack()
+
+        self.settings_button = tk.Button(button_frame, text="Change App…", command=self.change_target_dialog)
+        self.settings_button.grid(row=0, column=0, padx=5)
+
+        self.pause_button = tk.Button(button_frame, text="Pause", command=self.toggle_pause)
+        self.pause_button.grid(row=0, column=1, padx=5)
+
+        self.save_button = tk.Button(button_frame, text="Save", command=self.save_time_to_csv)
+        self.save_button.grid(row=0, column=2,padx=5)
+
+        if stats.ENABLED:
+            self.stats_button = tk.Button(button_frame, text="Stats…", command=self.stats_dialog)
+            self.stats_button.grid(row=0, column=3, padx=5)
+        
+
+        # State
+        self.profile = profile
+        self.target_window, self.timer_title, self.storage_name = load_config(profile)
+        self.targets = load_targets(profile)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.paused = False
+        self.renderer = Renderer()
+        self.rollups = RollupStore()
+        self.week_saved = 0
+        # All timing lives in the engine; this window only draws it
+        self.engine = TrackingEngine(self.tracking_rules(), lambda: get_storage(self.storage_name), on_change=self.refresh_state)
+        self.ticker = Ticker(self.root.after, self.root.after_cancel, self.update_timer,
+                             anchor=self.engine.tick_anchor, on_gap=self.engine.skip_gap,
+                             visible=lambda: self.root.state() != "iconic")
+
+        self.update_target_label()
+        self.update_title_label()
+        self.update_timer()
+        self.root.after(SAVE_POLL_INTERVAL, self.refresh_week)
+        self.engine.start(self.root.after, self.root.after_cancel, CHECK_INTERVAL)
+
+        self.checkpointer = None
+        self.recover_checkpoints()
+        interval = load_setting("checkpoint_interval", CHECKPOINT_INTERVAL, profile)
+        if interval:
+            self.checkpointer = Checkpointer(self.engine, self.root.after, self.root.after_cancel, interval)
+            self.checkpointer.start()
+        self.stop_watch = config.store.watch(self.root.after, self.on_config_change, self.root.after_cancel)
+
+    def recover_checkpoints(self):
+        orphans = find_orphans()
+        if not orphans:
+            return
+        from tkinter import messagebox
+        answer = messagebox.askyesnocancel(
+            "Recover unsaved time",
+            "A previous session ended without saving:\n\n" + describe(orphans) +
+            "\n\nYes: save it to the log now\nNo: put it back on this timer\nCancel: ask again next time")
+        for path, lock, data in orphans:
+            if answer is None:
+                # Cancelled or closed: the checkpoint stays for the next start
+                release(lock)
+                continue
+            if answer is True:
+                self.engine.save_recovered(data["date"], data["totals"])
+            elif answer is False:
+                self.engine.restore(data["totals"])
+            discard(path, lock)
+        if answer is True:
+            self.root.after(SAVE_POLL_INTERVAL, self.check_saves)
+
+    def tracking_rules(self):
+        return tracking_rules(self.target_window, self.timer_title, self.targets)
+
+    def update_target_label(self):
+        if self.targets:
+            self.target_label.config(text=f"Tracking: {len(self.targets)} apps")
+        elif self.target_window.strip() == "":
+            self.target_label.config(text="Tracking: All Windows (Always On)")
+        else:
+            self.target_label.config(text=f"Tracking: {self.target_window}")
+
+    def refresh_week(self):
+        # Saved time this week comes from the rollups; the unsaved part is added per redraw
+        titles = [title for _, title in self.tracking_rules()]
+        self.week_saved = self.rollups.total("week", current_keys()["week"], titles)
+        self.update_timer()
+
+    def apply_settings(self, target, title, rename=True):
+        if rename and not self.targets:
+            # Time tracked so far moves to the new title, like it did when saving
+            self.engine.rename(self.timer_title, title)
+        self.target_window = target
+        self.timer_title = title
+        self.update_target_label()
+        self.update_title_label()
+        self.engine.set_rules(self.tracking_rules())
+        self.refresh_week()
+
+    def on_config_change(self):
+        # config.json changed (here or in another instance). Only instances with a
+        # profile follow it: without one, every instance shares the top-level keys and
+        # would take over whatever another instance saved. Time already tracked stays
+        # under its title; a different storage backend takes effect on the next start.
+        if not self.profile:
+            return
+        target, title, _ = load_config(self.profile)
+        targets = load_targets(self.profile)
+        if (target, title, targets) == (self.target_window, self.timer_title, self.targets):
+            return
+        self.targets = targets
+        self.apply_settings(target, title, rename=False)
+
+    def update_title_label(self):
+        self.title_label.config(text=self.timer_title if self.timer_title.strip() else "")
+
+    def change_target_dialog(self):
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Settings")
+        dialog.geometry("300x200")
+        dialog.resizable(False, False)
+
+        tk.Label(dialog, text="Window title to track:").pack(pady=(10, 0))
+        entry_var = tk.StringVar(value=self.target_window)
+        entry = tk.Entry(dialog, textvariable=entry_var, width=30)
+        entry.pack(pady=(0, 5))
+
+        check_var = tk.BooleanVar(value=self.target_window.strip() == "")
+        def toggle_entry():
+            entry.config(state=tk.DISABLED if check_var.get() else tk.NORMAL)
+        check = tk.Checkbutton(dialog, text="Track all the time (ignore window)", variable=check_var, command=toggle_entry)
+        check.pack()
+
+        tk.Label(dialog, text="Timer Title (optional):").pack(pady=(10, 0))
+        title_var = tk.StringVar(value=self.timer_title)
+        title_entry = tk.Entry(dialog, textvariable=title_var, width=30)
+        title_entry.pack()
+
+        def apply():
+            new_target = "" if check_var.get() else entry_var.get().strip()
+            new_title = title_var.get().strip()
+            self.apply_settings(new_target, new_title)
+            save_config(self.target_window, self.timer_title, self.storage_name, self.profile)
+            dialog.destroy()
+
+        tk.Button(dialog, text="Save", command=apply).pack(pady=(15, 10))
+
+        toggle_entry()
+        entry.focus()
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+        self.pause_button.config(text="Resume" if self.paused else "Pause")
+        self.engine.set_paused(self.paused)
+
+    def refresh_state(self):
+        # Called by the engine on focus changes, pause/resume and settings changes.
+        # The clock only ticks while it is actually running.
+        if self.engine.tracking:
+            self.ticker.activity()
+        else:
+            self.ticker.stop()
+        self.update_timer()
+
+    def update_timer(self):
+        # One pass over everything shown; the renderer skips what did not change
+        snapshot = self.engine.snapshot()
+        total = sum(snapshot.values())
+        if self.engine.tracking:
+            self.renderer.set_title(self.root, "Tracking…")
+        else:
+            self.renderer.set_title(self.root, "Paused (Manual)" if self.paused else "Paused")
+        self.renderer.set(self.label, text=format_seconds(total), fg="black" if self.engine.tracking else "gray")
+        self.renderer.set(self.week_label, text=f"This week: {format_seconds(self.week_saved + total)}")
+        if self.targets:
+            self.renderer.set(self.breakdown_label, text="\n".join(
+                f"{title}: {format_seconds(snapshot.get(title, 0))}" for _, title in self.targets))
+
+    def stats_dialog(self):
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Stats")
+        dialog.resizable(False, False)
+
+        text_label = tk.Label(dialog, text=stats.format_stats(), font=("Courier", 9), justify=tk.LEFT)
+        text_label.pack(padx=10, pady=10)
+
+        def refresh():
+            text_label.config(text=stats.format_stats())
+
+        def dump():
+            from tkinter import messagebox
+            messagebox.showinfo("Stats", f"Stats written to {stats.dump()}.", parent=dialog)
+
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(pady=(0, 10))
+        tk.Button(button_frame, text="Refresh", command=refresh).grid(row=0, column=0, padx=5)
+        tk.Button(button_frame, text="Save JSON", command=dump).grid(row=0, column=1, padx=5)
+
+    def save_time_to_csv(self):
+        if not self.targets and not self.timer_title.strip():
+            from tkinter import simpledialog, messagebox
+            title = simpledialog.askstring("Title Required", "Enter a title for this session:")
+            if not title:
+                messagebox.showwarning("Cancelled", "Cannot save without a title.")
+                return
+            self.apply_settings(self.target_window, title.strip())
+            save_config(self.target_window, self.timer_title, self.storage_name, self.profile)
+
+        # The write happens on the writer thread; the timer keeps running meanwhile
+        was_busy = self.engine.saving()
+        self.engine.save(keep_empty_title=None if self.targets else self.timer_title)
+        self.update_timer()
+        self.save_button.config(text="Saving…")
+        if not was_busy:
+            self.root.after(SAVE_POLL_INTERVAL, self.check_saves)
+
+    def check_saves(self):
+        from tkinter import messagebox
+        results = self.engine.poll_saves()
+        if results and self.checkpointer is not None:
+            # Saved time must leave the checkpoint right away, or a crash would recover it twice
+            self.checkpointer.write()
+        for saved, failed, error in results:
+            if failed:
+                self.update_timer()
+                messagebox.showerror("Save failed", f"Could not save the time ({self.storage_name}): {error}")
+            if saved:
+                titles = ", ".join(f"'{title}'" for _, title in saved)
+                date_str = next(iter(saved))[0]
+                messagebox.showinfo("Saved", f"Time saved ({self.storage_name}) under {titles} for {date_str}.")
+        if results:
+            self.refresh_week()
+        if self.engine.saving():
+            self.root.after(SAVE_POLL_INTERVAL, self.check_saves)
+        else:
+            self.save_button.config(text="Save")
+
+    def on_close(self):
+        self.stop_watch()
+        self.ticker.stop()
+        self.engine.close()
+        self.rollups.close()
+        if self.checkpointer is not None:
+            self.checkpointer.stop()
+        if stats.ENABLED:
+            stats.dump()
+        self.root.destroy()
+
+def report_startup_time(root, app, imported):
+    # Time from the first line of this file until the window is on screen
+    root.update()
+    drawn = time.perf_counter()
+    report = (f"imports: {(imported - STARTED) * 1000:.0f} ms\n"
+              f"window drawn: {(drawn - STARTED) * 1000:.0f} ms")
+    if sys.stdout is not None:
+        print(report)
+    else:
+        # Windowed frozen build: there is no console to print to
+        from tkinter import messagebox
+        messagebox.showinfo("Startup time", report)
+    app.on_close()
+
+# === RUN ===
+if __name__ == "__main__":
+    imported = time.perf_counter()
+    root = tk.Tk()
+    app = TimeTrackerApp(root, current_profile(sys.argv))
+    if "--startup-time" in sys.argv:
+        report_startup_time(root, app, imported)
+    else:
+        root.mainloop()
\ No newline at end of file
@@ -0,0 +1,46 @@
+# -*- mode: python ; coding: utf-8 -*-
+
+# One-folder build: nothing is unpacked to a temp dir on launch, and no UPX, so the
+# DLLs are mapped straight from disk instead of being decompressed every start.
+
+a = Analysis(
+    ['v6.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=['numpy', 'unittest', 'doctest', 'pydoc', 'pdb', 'lib2to3', 'xmlrpc', 'tkinter.test', 'test'],
+    noarchive=False,
+    optimize=1,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='v6',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='v6',
+)
@@ -1,5 +1,8 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+# One-folder build instead of the old one-file UPX exe: nothing is unpacked to a temp
+# dir on launch, and no UPX, so the DLLs are mapped straight from disk instead of
+# being decompressed every start (dist/v5/v5.exe).
 
 a = Analysis(
     ['src\\v5.py'],
@@ -10,25 +13,22 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['numpy', 'unittest', 'doctest', 'pydoc', 'pdb', 'lib2to3', 'xmlrpc', 'tkinter.test', 'test'],
     noarchive=False,
-    optimize=0,
+    optimize=1,
 )
 pyz = PYZ(a.pure)
 
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='v5',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -36,3 +36,12 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='v5',
+)